@@ -0,0 +1,4 @@
+"""Helpers shared by the local-excel and google-sheets translation scripts."""
+
+# Placeholder written for keys missing in a language, never imported into resource files
+UNTRANSLATED = "UNTRANSLATED"
@@ -0,0 +1,102 @@
+"""Android strings.xml resource helpers."""
+import io
+import xml.etree.ElementTree as ET
+
+from . import UNTRANSLATED
+from .files import write_atomic
+
+
+def iter_android_strings(file_path):
+    """Yield (key, value, translatable) for every <string name="..."> in a strings.xml file.
+
+    The file is read incrementally with iterparse and finished elements are
+    released as soon as they are handled, so peak memory depends on the size of
+    one element rather than the size of the file. value is the raw element text
+    (None when empty), as ElementTree would report it.
+    """
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        if elem.tag == 'string':
+            key = elem.get('name')
+            if key is not None:
+                # Check if the translatable attribute is present and set to "false"
+                translatable_attr = elem.get('translatable')
+                translatable = not (translatable_attr and translatable_attr.lower() == 'false')
+                yield key, elem.text, translatable
+
+        if depth == 1:
+            # A top-level child of <resources> is complete, drop it and anything it held
+            root.clear()
+
+
+def merge_android_strings(xml_file, translations):
+    """Merge {key: value} translations for one language into xml_file, creating it when missing.
+
+    Every <string> is indexed by name once, then adds and updates are applied
+    in a single pass over translations. Empty and UNTRANSLATED values are
+    skipped. The file is written once, atomically, and only when the
+    serialized bytes differ from what is on disk.
+
+    Returns the changes as a list of ('added' | 'updated', key, value).
+    """
+    # lxml is only needed by the importers, the exporters stay on the standard library
+    from lxml import etree
+
+    try:
+        with open(xml_file, 'rb') as f:
+            original = f.read()
+    except FileNotFoundError:
+        original = None
+
+    if original is None:
+        tree = etree.ElementTree(etree.Element('resources'))
+    else:
+        tree = etree.parse(io.BytesIO(original))
+    root_elem = tree.getroot()
+
+    # Read existing xml keys once, a key may be declared more than once
+    string_elems = {}
+    for string_elem in root_elem.iter('string'):
+        string_elems.setdefault(string_elem.get('name'), []).append(string_elem)
+
+    changes = []
+    for key, value in translations.items():
+        excel_value = str(value).strip() if value else None
+        if excel_value is None or excel_value == UNTRANSLATED:
+            continue
+
+        if key not in string_elems:
+            # If the key does not exist, add a new line with the translation from the sheet
+            new_string_elem = etree.SubElement(root_elem, 'string', name=key)
+            new_string_elem.text = excel_value
+            string_elems[key] = [new_string_elem]
+            changes.append(('added', key, excel_value))
+            continue
+
+        updated = False
+        for string_elem in string_elems[key]:
+            xml_value = string_elem.text.strip() if string_elem.text else None
+            if xml_value != excel_value:
+                string_elem.text = excel_value
+                updated = True
+        if updated:
+            changes.append(('updated', key, excel_value))
+
+    if original is not None and not changes:
+        return changes
+
+    # Apply indentation
+    etree.indent(tree, space="\t", level=0)
+    data = etree.tostring(tree, encoding='utf-8', xml_declaration=True, pretty_print=True)
+    if data != original:
+        write_atomic(xml_file, data)
+
+    return changes
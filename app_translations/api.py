@@ -0,0 +1,351 @@
+"""In-process API of the export and import scripts.
+
+Every function takes its configuration as parameters (sources, language
+mappers, output folders) and returns its results instead of printing them,
+nothing is kept at module level, so several exports and imports can run in
+the same process, one after the other or on different threads. Folders are
+used as given and the working directory is never changed.
+
+gspread, oauth2client, openpyxl, xlsxwriter and lxml are only imported by
+the calls that need them, importing this module stays cheap.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .android import merge_android_strings
+from .cache import ParseCache, WorkbookStamp
+from .csvexport import CsvExport, make_session, read_csv_translations
+from .discovery import discover_resource_files
+from .ios import merge_ios_strings
+from .parsing import map_resource_languages, merge_translations, parse_resource_files, process_android_file, \
+    process_ios_file
+from .sheets import DEFAULT_MAX_PAYLOAD_BYTES, DEFAULT_MAX_RETRIES, DEFAULT_REQUESTS_PER_MINUTE, KeyIndexCache, \
+    RequestScheduler, build_rows, diff_blocks, is_retryable_api_error, open_worksheet, spreadsheet_modified_time, \
+    write_blocks, write_new_rows
+from .table import TranslationTable
+from .timings import Timings, file_size
+from .workbook import load_workbook_translations, write_translations_workbook
+
+PLATFORMS = ('android', 'ios')
+
+# Scopes of the service account used by the Google Sheets export
+GOOGLE_SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+
+def export_excel(android_sources, ios_sources, excel_file, android_language_mapper, ios_language_mapper, jobs=1,
+                 ignore_patterns=None, cache_dir=None, timings=None):
+    """Export the Android and iOS resources below the sources to excel_file.
+
+    The language mappers map resource folders (values-en, en.lproj) to
+    column names. Returns {'android': TranslationTable, 'ios': TranslationTable}.
+    With cache_dir the workbook is not written again when the resource files
+    and mappers are the same as for the last export and nobody touched it.
+    """
+    timings = timings if timings is not None else Timings()
+    manifest_path = os.path.join(cache_dir, 'manifest.json') if cache_dir else None
+    texts_android = TranslationTable()
+    texts_ios = TranslationTable()
+
+    with timings.phase('load caches'):
+        parse_cache = ParseCache(os.path.join(cache_dir, 'parse-cache.json')) if cache_dir else None
+        stamp = WorkbookStamp(os.path.join(cache_dir, 'workbook.json')) if cache_dir else None
+
+    # Find Android and iOS files in a single walk
+    with timings.phase('discover'):
+        android_paths, ios_paths = discover_resource_files(android_sources, ios_sources, ignore_patterns,
+                                                           manifest_path)
+    timings.count('files_scanned', len(android_paths) + len(ios_paths))
+
+    # Process Android and iOS files
+    with timings.phase('parse'):
+        android_files = map_resource_languages(android_paths, android_language_mapper)
+        android_results = parse_resource_files(process_android_file, android_files, jobs, parse_cache, timings)
+        ios_files = map_resource_languages(ios_paths, ios_language_mapper)
+        ios_results = parse_resource_files(process_ios_file, ios_files, jobs, parse_cache, timings)
+
+        if parse_cache is not None:
+            parse_cache.save()
+
+    with timings.phase('merge'):
+        merge_translations(texts_android, android_results)
+        merge_translations(texts_ios, ios_results)
+    timings.count('keys_processed', len(texts_android) + len(texts_ios))
+
+    # Same resource files and mappers as the workbook on disk, written by the last export and untouched since
+    inputs = None
+    if stamp is not None:
+        # In merge order, a later file of the same language wins for repeated keys
+        digests = [[file_path, parse_cache.digest(file_path)] for file_path in android_paths + ios_paths]
+        if all(digest is not None for _, digest in digests):
+            inputs = {'android': android_language_mapper, 'ios': ios_language_mapper, 'files': digests}
+    if inputs is not None and stamp.matches(excel_file, inputs):
+        timings.count('workbooks_unchanged')
+        return {'android': texts_android, 'ios': texts_ios}
+
+    with timings.phase('write workbook'):
+        write_translations_workbook(excel_file, {
+            'Android': (texts_android, list(android_language_mapper.values())),
+            'iOS': (texts_ios, list(ios_language_mapper.values())),
+        })
+        if inputs is not None:
+            stamp.save(excel_file, inputs)
+    # Header and one row per key, column A holds the keys
+    timings.count('cells_written', (len(texts_android) + 1) * len(android_language_mapper) + len(texts_android))
+    timings.count('cells_written', (len(texts_ios) + 1) * len(ios_language_mapper) + len(texts_ios))
+    timings.count_file('bytes_written', excel_file)
+
+    return {'android': texts_android, 'ios': texts_ios}
+
+
+def google_client(credentials_file='secure/service_account.json'):
+    """A gspread client authorized with the service account in credentials_file."""
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    credentials = ServiceAccountCredentials.from_json_keyfile_name(credentials_file, GOOGLE_SCOPES)
+    return gspread.authorize(credentials)
+
+
+def _export_platform(scheduler, spreadsheet, index, title, language_mapper, resource_paths, process_file, parse_cache,
+                     sync_mode, key_index, modified_time, max_payload_bytes, timings):
+    # Sync one platform worksheet, returning its new keys and changed cells (None with the new sync)
+    texts = TranslationTable()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Download the worksheet keys while the local resource files are parsed
+        remote = executor.submit(timings.timed, f'{title} read sheet', open_worksheet, scheduler, spreadsheet, index,
+                                 title, sync_mode, key_index, modified_time)
+
+        with timings.phase(f'{title} parse'):
+            resource_files = map_resource_languages(resource_paths, language_mapper)
+            merge_translations(texts, parse_resource_files(process_file, resource_files, 1, parse_cache, timings))
+        timings.count('keys_processed', len(texts))
+
+        worksheet, sheet_values = remote.result()
+
+    language_names = list(language_mapper.values())
+    if sync_mode == 'diff':
+        # New keys, new languages and changed values in a single batched update
+        blocks, changed_cells, new_keys = diff_blocks(sheet_values, texts, language_names)
+        with timings.phase(f'{title} write sheet'):
+            write_blocks(scheduler, worksheet, blocks, max_payload_bytes)
+        timings.count('cells_written', sum(len(row) for _, _, rows in blocks for row in rows))
+    else:
+        key_column, header_row = sheet_values
+        changed_cells = None
+
+        # Write headers if not exists
+        header = None if set(filter(None, header_row)) == set(language_names) else language_names
+
+        # Compare keys with the ones from the spreadsheet
+        keys_from_sheet = set(key_column[1:])
+        new_keys = [key for key in texts if key not in keys_from_sheet]
+
+        # Header and new keys go in one batched update, appended after the last used row (never over the header)
+        rows = build_rows(new_keys, texts, language_names)
+        with timings.phase(f'{title} write sheet'):
+            write_new_rows(scheduler, worksheet, header, max(len(key_column), 1) + 1, rows, max_payload_bytes)
+        timings.count('cells_written', sum(len(row) for row in rows) + (len(header) if header is not None else 0))
+
+    timings.count('keys_added', len(new_keys))
+    return {'new_keys': new_keys, 'changed_cells': changed_cells}
+
+
+def export_google_sheets(android_sources, ios_sources, spreadsheet_id, android_language_mapper, ios_language_mapper,
+                         ignore_patterns=None, cache_dir=None, sync_mode='new',
+                         credentials_file='secure/service_account.json', client=None, scheduler=None,
+                         requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, max_retries=DEFAULT_MAX_RETRIES,
+                         max_payload_bytes=DEFAULT_MAX_PAYLOAD_BYTES, timings=None):
+    """Export the Android and iOS resources below the sources to the first two worksheets of a spreadsheet.
+
+    client is an authorized gspread client, by default one is authorized
+    with the service account in credentials_file. Every call goes through
+    scheduler, pass the same one to several exports to share one quota.
+    sync_mode 'new' uploads missing keys only, 'diff' also updates the cells
+    whose value changed. Returns {'url': ..., 'api': scheduler stats,
+    'android': {'new_keys': [...], 'changed_cells': ...}, 'ios': {...}},
+    changed_cells is None with the new sync.
+    """
+    timings = timings if timings is not None else Timings()
+    scheduler = scheduler if scheduler is not None else RequestScheduler(requests_per_minute, max_retries,
+                                                                         is_retryable_api_error)
+    manifest_path = os.path.join(cache_dir, 'manifest.json') if cache_dir else None
+    with timings.phase('load caches'):
+        parse_cache = ParseCache(os.path.join(cache_dir, 'parse-cache.json')) if cache_dir else None
+        key_index = (KeyIndexCache(os.path.join(cache_dir, 'key-index.json')) if cache_dir and sync_mode == 'new'
+                     else None)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Find Android and iOS files in a single walk while the spreadsheet is opened
+        discovery = executor.submit(timings.timed, 'discover', discover_resource_files, android_sources, ios_sources,
+                                    ignore_patterns, manifest_path)
+
+        with timings.phase('open spreadsheet'):
+            if client is None:
+                client = google_client(credentials_file)
+
+            # Open an existing spreadsheet by key
+            spreadsheet = scheduler.call(client.open_by_key, spreadsheet_id)
+            # Read before any worksheet keys, an edit made while they download makes the next run fetch them again
+            modified_time = spreadsheet_modified_time(scheduler, spreadsheet) if key_index is not None else None
+        android_paths, ios_paths = discovery.result()
+        timings.count('files_scanned', len(android_paths) + len(ios_paths))
+
+        # The Android and iOS worksheets are independent, sync both at the same time
+        android = executor.submit(_export_platform, scheduler, spreadsheet, 0, 'Android', android_language_mapper,
+                                  android_paths, process_android_file, parse_cache, sync_mode, key_index,
+                                  modified_time, max_payload_bytes, timings)
+        ios = executor.submit(_export_platform, scheduler, spreadsheet, 1, 'iOS', ios_language_mapper,
+                              ios_paths, process_ios_file, parse_cache, sync_mode, key_index, modified_time,
+                              max_payload_bytes, timings)
+        results = {'android': android.result(), 'ios': ios.result()}
+
+    with timings.phase('save caches'):
+        if parse_cache is not None:
+            parse_cache.save()
+        if key_index is not None:
+            key_index.save()
+
+    stats = scheduler.stats()
+    timings.count_stats('api', stats)
+    return dict(results, url=spreadsheet.url, api=stats)
+
+
+def write_android_language(texts, lang, directory='', timings=None):
+    """Merge the lang column of texts into directory/lang/strings.xml.
+
+    Returns (file path, whether the file existed, changes).
+    """
+    timings = timings if timings is not None else Timings()
+    os.makedirs(os.path.join(directory, lang), exist_ok=True)
+
+    xml_file = os.path.join(directory, lang, 'strings.xml')
+    size_before = file_size(xml_file)
+    # Adds and updates are applied in one pass and the file is written at most once
+    translations = dict(texts.locale_items(lang))
+    changes = merge_android_strings(xml_file, translations)
+    timings.count_merge(xml_file, size_before, translations, changes)
+    return xml_file, size_before is not None, changes
+
+
+def write_ios_language(texts, lang, directory='', timings=None):
+    """Merge the lang column of texts into directory/lang/Localizable.strings.
+
+    Returns (file path, whether the file existed, changes).
+    """
+    timings = timings if timings is not None else Timings()
+    os.makedirs(os.path.join(directory, lang), exist_ok=True)
+
+    strings_file = os.path.join(directory, lang, 'Localizable.strings')
+    size_before = file_size(strings_file)
+    # Adds and updates are applied in memory and the file is written at most once
+    translations = dict(texts.locale_items(lang))
+    changes = merge_ios_strings(strings_file, translations)
+    timings.count_merge(strings_file, size_before, translations, changes)
+    return strings_file, size_before is not None, changes
+
+
+def _write_resources(executor, tables, language_mappers, directories, timings):
+    # {platform: [(lang, (file path, existed, changes))]} in mapper order, every locale folder written concurrently
+    writers = {'android': write_android_language, 'ios': write_ios_language}
+    futures = {platform: [(lang, executor.submit(writers[platform], tables[platform], lang, directories[platform],
+                                                 timings))
+                          for lang in language_mappers[platform].values()]
+               for platform in PLATFORMS if platform in tables}
+    return {platform: [(lang, future.result()) for lang, future in platform_futures]
+            for platform, platform_futures in futures.items()}
+
+
+def import_excel(excel_file, android_language_mapper=None, ios_language_mapper=None, android_dir='', ios_dir='',
+                 jobs=8, timings=None):
+    """Import the Android and iOS worksheets of excel_file into the resource folders below android_dir and ios_dir.
+
+    The language mappers map column names to resource folders, a platform
+    without mapper is skipped. Returns {'android': [(lang, (file path,
+    existed, changes))], 'ios': [...]} for the imported platforms.
+    """
+    timings = timings if timings is not None else Timings()
+    language_mappers = {'android': android_language_mapper, 'ios': ios_language_mapper}
+    sheet_names = {'android': 'Android', 'ios': 'iOS'}
+    platforms = [platform for platform in PLATFORMS if language_mappers[platform] is not None]
+
+    # Load the workbook once for both platforms
+    with timings.phase('load workbook'):
+        sheets = load_workbook_translations(excel_file, {sheet_names[platform]: language_mappers[platform]
+                                                         for platform in platforms})
+    timings.count_file('bytes_read', excel_file)
+    tables = {platform: sheets[sheet_names[platform]] for platform in platforms}
+
+    with timings.phase('write resources'), ThreadPoolExecutor(max_workers=jobs) as executor:
+        return _write_resources(executor, tables, language_mappers, {'android': android_dir, 'ios': ios_dir},
+                                timings)
+
+
+def _fetch_tab(csv_export, language_mapper, offline):
+    # Download and parse on the same thread, the rows are consumed while they arrive
+    rows = csv_export.fetch(offline=offline)
+    if rows is None:
+        return None
+    return read_csv_translations(rows, language_mapper)
+
+
+def _load_unchanged_tab(csv_export, language_mapper):
+    # Another tab of the platform changed, this one is read from its snapshot
+    rows = csv_export.read_saved()
+    if rows is None:
+        rows = csv_export.fetch(conditional=False)
+    return read_csv_translations(rows, language_mapper)
+
+
+def import_google_sheets(spreadsheet_id, tabs, android_language_mapper=None, ios_language_mapper=None, android_dir='',
+                         ios_dir='', jobs=8, cache_dir=None, snapshot_ttl=0, offline=False, new_rows_only=False,
+                         session=None, timings=None):
+    """Import worksheet tabs, (platform, gid) pairs, of a public spreadsheet into the resource folders.
+
+    Tabs of the same platform are merged in order, later tabs win for
+    repeated keys. Only platforms whose tabs changed since the last import
+    are written, None is returned when none did, otherwise the result has
+    the shape of import_excel(). session is the requests session the CSV
+    exports are downloaded with, by default a new one pooling jobs
+    connections. FileNotFoundError is raised when offline finds no snapshot.
+    """
+    timings = timings if timings is not None else Timings()
+    language_mappers = {'android': android_language_mapper, 'ios': ios_language_mapper}
+    for platform, _ in tabs:
+        if language_mappers.get(platform) is None:
+            raise ValueError(f"No language mapper for the {platform} tabs")
+
+    # One keep-alive session for every tab, at most jobs connections at a time
+    session = session if session is not None else make_session(jobs)
+    # Only the key column and the mapped language columns of each tab are downloaded
+    exports = [(platform, CsvExport(spreadsheet_id, tab_gid, cache_dir, session, snapshot_ttl,
+                                    list(language_mappers[platform]), new_rows_only))
+               for platform, tab_gid in tabs]
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        with timings.phase('download'):
+            tables = list(executor.map(lambda export: _fetch_tab(export[1], language_mappers[export[0]], offline),
+                                       exports))
+
+            # Tabs of the same platform are merged in the given order, later tabs win for repeated keys
+            changed_platforms = {platform for (platform, _), table in zip(exports, tables) if table is not None}
+            texts = {platform: TranslationTable() for platform in changed_platforms}
+            for (platform, csv_export), table in zip(exports, tables):
+                if platform in changed_platforms:
+                    texts[platform].update(table if table is not None
+                                           else _load_unchanged_tab(csv_export, language_mappers[platform]))
+
+        for _, csv_export in exports:
+            timings.count_stats('http', csv_export.stats())
+        if not changed_platforms:
+            return None
+
+        with timings.phase('write resources'):
+            results = _write_resources(executor, texts, language_mappers, {'android': android_dir, 'ios': ios_dir},
+                                       timings)
+
+    # Next runs skip the tabs that did not change
+    for _, csv_export in exports:
+        csv_export.commit()
+
+    return results
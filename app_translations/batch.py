@@ -0,0 +1,205 @@
+"""Exports and imports of every project listed in a manifest, run on a bounded pool of threads.
+
+The manifest is a JSON file with a list of projects and optional defaults
+applied to each of them:
+
+    {
+        "defaults": {"androidLanguages": {"values": "SPANISH", "values-en": "ENGLISH"},
+                     "iosLanguages": {"es.lproj": "SPANISH", "en.lproj": "ENGLISH"}},
+        "projects": [
+            {"name": "login", "androidSources": "features/login/src/main/res", "iosSources": "ios/Login",
+             "excelFile": "translations/login.xlsx"},
+            {"name": "checkout", "androidSources": "features/checkout/src/main/res", "iosSources": "ios/Checkout",
+             "spreadsheetId": "1QCl...", "tabs": ["android:1225980718", "ios:375629473"]}
+        ]
+    }
+
+The language mappers map resource folders to spreadsheet columns, imports
+use them the other way round. Relative paths are relative to the manifest.
+"""
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import PLATFORMS, export_excel, export_google_sheets, google_client, import_excel, import_google_sheets
+from .sheets import DEFAULT_MAX_RETRIES, DEFAULT_REQUESTS_PER_MINUTE, RequestScheduler, is_retryable_api_error
+from .timings import Timings
+
+PATH_FIELDS = ('androidSources', 'iosSources', 'androidDir', 'iosDir', 'excelFile')
+
+# Locale files of one project written at the same time, on top of the projects run at the same time
+LOCALE_JOBS = 4
+
+
+def load_manifest(manifest_path):
+    """The projects of a manifest with the defaults applied and absolute paths, ValueError when one is invalid."""
+    with open(manifest_path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    defaults = data.get('defaults', {})
+    projects = []
+    for entry in data.get('projects', []):
+        project = dict(defaults, **entry)
+        name = project.get('name')
+        if not name:
+            raise ValueError("Every project of the manifest needs a name")
+        if any(other['name'] == name for other in projects):
+            raise ValueError(f"Project {name} is listed twice")
+        # A project with its own destination replaces the default one
+        if 'excelFile' in entry and 'spreadsheetId' not in entry:
+            project.pop('spreadsheetId', None)
+        elif 'spreadsheetId' in entry and 'excelFile' not in entry:
+            project.pop('excelFile', None)
+        if ('excelFile' in project) == ('spreadsheetId' in project):
+            raise ValueError(f"Project {name} needs either an excelFile or a spreadsheetId")
+        for field in ('androidSources', 'iosSources', 'androidLanguages', 'iosLanguages'):
+            if field not in project:
+                raise ValueError(f"Project {name} has no {field}")
+
+        for field in PATH_FIELDS:
+            if field in project:
+                project[field] = os.path.join(base_dir, project[field])
+        project.setdefault('androidDir', project['androidSources'])
+        project.setdefault('iosDir', project['iosSources'])
+        projects.append(project)
+    return projects
+
+
+def parse_tabs(project):
+    # "android:1225980718" -> ('android', '1225980718')
+    tabs = []
+    for value in project.get('tabs', []):
+        platform, _, tab_gid = value.partition(':')
+        if platform not in PLATFORMS or not tab_gid:
+            raise ValueError(f"Project {project['name']}: expected android:<gid> or ios:<gid>, got {value}")
+        tabs.append((platform, tab_gid))
+    if not tabs:
+        raise ValueError(f"Project {project['name']} has a spreadsheetId but no tabs to import")
+    return tabs
+
+
+def project_cache_dir(cache_dir, name):
+    # Each project keeps its caches apart, they are written by different threads
+    return os.path.join(cache_dir, re.sub(r'[^\w.-]', '_', name)) if cache_dir else None
+
+
+def import_changes(results):
+    # {platform: {lang: {'file', 'created', 'added', 'updated'}}} of import_excel() and import_google_sheets()
+    report = {}
+    for platform, platform_results in results.items():
+        report[platform] = {}
+        for lang, (resource_file, existed, changes) in platform_results:
+            report[platform][lang] = {
+                'file': resource_file,
+                'created': not existed,
+                'added': {key: value for action, key, value in changes if action == 'added'},
+                'updated': {key: value for action, key, value in changes if action == 'updated'},
+            }
+    return report
+
+
+def run_project(project, action, cache_dir=None, sync_mode='new', client=None, scheduler=None, timings=None):
+    """Export or import one project of the manifest, returning its entry of the batch report."""
+    timings = timings if timings is not None else Timings()
+    android_languages = project['androidLanguages']
+    ios_languages = project['iosLanguages']
+    ignore_patterns = project.get('ignore', [])
+
+    if action == 'export' and 'excelFile' in project:
+        tables = export_excel(project['androidSources'], project['iosSources'], project['excelFile'],
+                              android_languages, ios_languages, 1, ignore_patterns, cache_dir, timings)
+        return {'status': 'ok', 'workbook': project['excelFile'],
+                'android': {'keys': len(tables['android'])}, 'ios': {'keys': len(tables['ios'])}}
+
+    if action == 'export':
+        result = export_google_sheets(project['androidSources'], project['iosSources'], project['spreadsheetId'],
+                                      android_languages, ios_languages, ignore_patterns, cache_dir,
+                                      project.get('sync', sync_mode), client=client, scheduler=scheduler,
+                                      timings=timings)
+        return {'status': 'ok', 'url': result['url'], 'android': result['android'], 'ios': result['ios']}
+
+    # Imports map the spreadsheet columns back to the resource folders
+    android_folders = {column: folder for folder, column in android_languages.items()}
+    ios_folders = {column: folder for folder, column in ios_languages.items()}
+    if 'excelFile' in project:
+        results = import_excel(project['excelFile'], android_folders, ios_folders, project['androidDir'],
+                               project['iosDir'], LOCALE_JOBS, timings)
+    else:
+        results = import_google_sheets(project['spreadsheetId'], parse_tabs(project), android_folders, ios_folders,
+                                       project['androidDir'], project['iosDir'], LOCALE_JOBS, cache_dir,
+                                       timings=timings)
+        if results is None:
+            return {'status': 'unchanged'}
+    return dict({'status': 'ok'}, **import_changes(results))
+
+
+def summarize(action, projects):
+    # Totals over the {name: entry} project reports
+    totals = {'projects': len(projects)}
+    for status in ('ok', 'unchanged', 'failed'):
+        totals[status] = sum(1 for entry in projects.values() if entry['status'] == status)
+
+    if action == 'export':
+        totals['keys'] = totals['new_keys'] = totals['changed_cells'] = 0
+        for entry in projects.values():
+            for platform in PLATFORMS:
+                result = entry.get(platform, {})
+                totals['keys'] += result.get('keys', 0)
+                totals['new_keys'] += len(result.get('new_keys', []))
+                totals['changed_cells'] += result.get('changed_cells') or 0
+    else:
+        totals['files_created'] = totals['files_changed'] = totals['keys_added'] = totals['keys_updated'] = 0
+        for entry in projects.values():
+            for platform in PLATFORMS:
+                for lang_report in entry.get(platform, {}).values():
+                    totals['files_created'] += lang_report['created']
+                    totals['files_changed'] += not lang_report['created'] and bool(lang_report['added']
+                                                                                    or lang_report['updated'])
+                    totals['keys_added'] += len(lang_report['added'])
+                    totals['keys_updated'] += len(lang_report['updated'])
+    return totals
+
+
+def run_batch(projects, action, jobs=4, cache_dir=None, sync_mode='new',
+              credentials_file='secure/service_account.json', requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+              max_retries=DEFAULT_MAX_RETRIES, timings=None):
+    """Run action ('export' or 'import') for every project, jobs projects at a time.
+
+    A failing project does not stop the others, its entry gets status
+    'failed' and the error. Google Sheets exports share one authorized
+    client and one request scheduler, so together they stay within the API
+    quota. Returns {'action', 'projects': {name: entry}, 'totals'}, the
+    projects in manifest order.
+    """
+    timings = timings if timings is not None else Timings()
+    client = scheduler = None
+    if action == 'export' and any('spreadsheetId' in project for project in projects):
+        client = google_client(credentials_file)
+        scheduler = RequestScheduler(requests_per_minute, max_retries, is_retryable_api_error)
+
+    def run(project):
+        project_timings = Timings(project['name'])
+        start = time.perf_counter()
+        try:
+            entry = run_project(project, action, project_cache_dir(cache_dir, project['name']), sync_mode, client,
+                                scheduler, project_timings)
+        except Exception as e:
+            entry = {'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+        entry['seconds'] = round(time.perf_counter() - start, 3)
+
+        # The batch counters add up the counters of every project, the shared scheduler is counted once at the end
+        for name, value in project_timings.report()['counters'].items():
+            if not name.startswith('api_'):
+                timings.count(name, value)
+        return entry
+
+    with timings.phase('projects'), ThreadPoolExecutor(max_workers=jobs) as executor:
+        entries = list(executor.map(run, projects))
+
+    reports = {project['name']: entry for project, entry in zip(projects, entries)}
+    if scheduler is not None:
+        timings.count_stats('api', scheduler.stats())
+    return {'action': action, 'projects': reports, 'totals': summarize(action, reports)}
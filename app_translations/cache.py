@@ -0,0 +1,170 @@
+"""Persistent cache of parsed resource files shared by the exporters."""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .files import write_atomic
+
+# Bump whenever the parsers change what they return for the same file
+CACHE_VERSION = 2
+
+# Upper bound for the cached translations, least recently used files are evicted past it
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def file_digest(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_bytes(translations):
+    # Cheap estimate of the serialized size, close enough to bound the cache
+    return sum(len(key) + len(value) + 8 for key, value in translations.items())
+
+
+class ParseCache:
+    """On-disk cache of the {key: value} table parsed from each resource file.
+
+    Entries are keyed by file path and validated against the file size and
+    mtime. When only the mtime moved (a checkout or a touch) the content hash
+    decides, so unchanged files are never parsed twice. Once the cache grows
+    past max_bytes the least recently used entries are evicted on save.
+    """
+
+    def __init__(self, cache_path, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.entries = self._load()
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        # The exporters may parse both platforms on different threads
+        self.lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get('version') != CACHE_VERSION:
+            return {}
+        return data['entries']
+
+    def get(self, file_path):
+        entry = self.entries.get(file_path)
+        if entry is not None:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                stat = None
+
+            if stat is not None and stat.st_size == entry['size']:
+                if stat.st_mtime_ns == entry['mtime'] or file_digest(file_path) == entry['digest']:
+                    with self.lock:
+                        if stat.st_mtime_ns != entry['mtime']:
+                            entry['mtime'] = stat.st_mtime_ns
+                            self.dirty = True
+                        # Not marked dirty otherwise, a run with only hits never rewrites the cache
+                        entry['used'] = time.time()
+                        self.hits += 1
+                    return entry['translations']
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def digest(self, file_path):
+        # Content hash of file_path when it was last parsed, None when not cached
+        entry = self.entries.get(file_path)
+        return entry['digest'] if entry is not None else None
+
+    def put(self, file_path, translations):
+        try:
+            stat = os.stat(file_path)
+            digest = file_digest(file_path)
+        except OSError:
+            return
+
+        with self.lock:
+            self.entries[file_path] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'digest': digest,
+                'used': time.time(),
+                'bytes': _entry_bytes(translations),
+                'translations': translations,
+            }
+            self.dirty = True
+
+    def parse(self, process_file, file_path, language_name):
+        # Same contract as process_file, (language_name, translations), served from the cache when possible
+        translations = self.get(file_path)
+        if translations is None:
+            language_name, translations = process_file(file_path, language_name)
+            self.put(file_path, translations)
+        return language_name, translations
+
+    def evict(self):
+        total = sum(entry['bytes'] for entry in self.entries.values())
+        if total <= self.max_bytes:
+            return
+
+        for file_path, entry in sorted(self.entries.items(), key=lambda item: item[1]['used']):
+            del self.entries[file_path]
+            total -= entry['bytes']
+            self.dirty = True
+            if total <= self.max_bytes:
+                break
+
+    def save(self):
+        self.evict()
+        if not self.dirty:
+            return
+
+        data = json.dumps({'version': CACHE_VERSION, 'entries': self.entries}, ensure_ascii=False)
+        write_atomic(self.cache_path, data.encode('utf-8'))
+        self.dirty = False
+
+
+class WorkbookStamp:
+    """The inputs of the last workbook written by the local export.
+
+    inputs is any JSON document describing what the workbook was made from,
+    the exporter uses the language mappers and the content hash of every
+    resource file. matches() is true while the inputs are the same and the
+    workbook was not touched since it was written, so writing it again
+    would produce the same file.
+    """
+
+    def __init__(self, stamp_path):
+        self.stamp_path = stamp_path
+
+    @staticmethod
+    def _workbook_state(excel_file):
+        try:
+            stat = os.stat(excel_file)
+        except OSError:
+            return None
+        return [os.path.abspath(excel_file), stat.st_size, stat.st_mtime_ns]
+
+    def matches(self, excel_file, inputs):
+        try:
+            with open(self.stamp_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        state = self._workbook_state(excel_file)
+        return (data.get('version') == CACHE_VERSION and state is not None and data['workbook'] == state
+                and data['inputs'] == inputs)
+
+    def save(self, excel_file, inputs):
+        data = {'version': CACHE_VERSION, 'workbook': self._workbook_state(excel_file), 'inputs': inputs}
+        write_atomic(self.stamp_path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
@@ -0,0 +1,309 @@
+"""Download of the CSV export of a Google Sheet worksheet, shared by the google-sheets importers."""
+import codecs
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .files import write_atomic
+from .snapshots import SnapshotStore
+from .table import TranslationTable
+
+CHUNK_SIZE = 64 * 1024
+
+
+META_VERSION = 2
+
+
+def export_url(spreadsheet_id, gid, cell_range=None):
+    url = f'https://docs.google.com/spreadsheets/d/{spreadsheet_id}/export?format=csv&gid={gid}'
+    return f'{url}&range={cell_range}' if cell_range else url
+
+
+def column_letter(number):
+    # 1 -> A, 27 -> AA
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def column_runs(indices):
+    """Group sorted 0-based column indices into (first, last) runs of adjacent columns."""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index - 1:
+            runs[-1] = (runs[-1][0], index)
+        else:
+            runs.append((index, index))
+    return runs
+
+
+def make_session(pool_size):
+    """A keep-alive requests.Session whose connection pool holds pool_size connections per host.
+
+    The export URL redirects to a download host, so a few hosts are pooled.
+    Threads wait for a free connection instead of opening extra ones.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def read_csv_translations(rows, language_mapper):
+    """Build a TranslationTable from the CSV rows of a worksheet, header row first.
+
+    language_mapper maps header names to resource folders, columns missing
+    from the header are left out and rows without a key are skipped.
+    """
+    header = next(rows, [])
+    language_indices = {lang: header.index(column_name)
+                        for column_name, lang in language_mapper.items() if column_name in header}
+
+    texts = TranslationTable(language_indices)
+    for row in rows:
+        if row and row[0]:
+            texts.add_key(row[0])
+            for lang, index in language_indices.items():
+                texts.set(row[0], lang, row[index].strip() if index < len(row) else None)
+    return texts
+
+
+def iter_text_lines(chunks, encoding='utf-8-sig'):
+    """Decode byte chunks and yield text lines with their line endings.
+
+    Keeping the endings lets the csv module see line breaks inside quoted
+    cells. Lines are only split on '\\n', so '\\r\\n' stays one line ending
+    even when it is split between two chunks.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        # The last piece may continue in the next chunk
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+class CsvExport:
+    """The CSV export of one worksheet, downloaded with conditional GETs.
+
+    With columns (header names) only the key column and those columns are
+    requested: the header row is read first and every run of adjacent
+    columns is downloaded as one range, concurrently. A single run is parsed
+    while it downloads. With new_rows_only only the rows past the last
+    committed import are requested.
+
+    The rows are kept as a snapshot in cache_dir. The ETag and Last-Modified
+    headers of the responses are only kept once commit() is called, usually
+    after the import finished, so the next fetch() sends them and gets None
+    back (304 from Google) when nothing it asks for changed. A snapshot
+    younger than snapshot_ttl seconds, or any snapshot when offline, is used
+    without going to the network at all. Without cache_dir every fetch is a
+    plain download. stats() counts the requests, 304 answers and downloaded
+    bytes.
+    """
+
+    def __init__(self, spreadsheet_id, gid, cache_dir=None, session=None, snapshot_ttl=0, columns=None,
+                 new_rows_only=False):
+        self.spreadsheet_id = spreadsheet_id
+        self.gid = gid
+        self.session = session
+        self.snapshot_ttl = snapshot_ttl
+        self.columns = list(columns) if columns is not None else None
+        self.new_rows_only = new_rows_only
+        self.snapshots = SnapshotStore(cache_dir) if cache_dir else None
+        self.meta_path = os.path.join(cache_dir, f'sheet-{spreadsheet_id}-{gid}.json') if cache_dir else None
+        self.meta = self._load_meta()
+        self.validators = {}
+        self.rows_seen = None
+        # Ranges are downloaded on several threads
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.downloaded_bytes = 0
+
+    def _load_meta(self):
+        if not self.meta_path:
+            return {}
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return meta if meta.get('version') == META_VERSION else {}
+
+    def _load_snapshot(self, max_age=None):
+        if not self.snapshots:
+            return None
+        return self.snapshots.load(self.spreadsheet_id, self.gid, max_age, self.columns)
+
+    def fetch(self, conditional=True, offline=False):
+        """Return an iterator over the CSV rows, or None when the worksheet is unchanged since the last commit().
+
+        With offline the saved snapshot is returned whatever its age, and
+        FileNotFoundError is raised when there is none.
+        """
+        if offline or not self.new_rows_only:
+            rows = self._load_snapshot(None if offline else self.snapshot_ttl)
+            if rows is not None:
+                return iter(rows)
+        if offline:
+            raise FileNotFoundError(f"No snapshot of worksheet {self.gid}, run once without -offline")
+
+        session = self.session or make_session(4)
+        first_row = self.meta.get('rows', 0) + 1 if self.new_rows_only else 1
+
+        if self.columns is None and first_row == 1:
+            names, plan = None, [(export_url(self.spreadsheet_id, self.gid), None)]
+        else:
+            header = self._get_header(session)
+            if self.columns is None:
+                indices = list(range(max(len(header), 1)))
+            else:
+                indices = sorted({0} | {header.index(name) for name in self.columns if name in header})
+            names = [header[index] if index < len(header) else '' for index in indices]
+            plan = []
+            for first, last in column_runs(indices):
+                cell_range = f'{column_letter(first + 1)}{first_row}:{column_letter(last + 1)}'
+                plan.append((export_url(self.spreadsheet_id, self.gid, cell_range),
+                             names[indices.index(first):indices.index(last) + 1]))
+        urls = [url for url, _ in plan]
+
+        # Revalidating only pays off when the unchanged parts can be taken from the snapshot
+        has_snapshot = self.snapshots and self.snapshots.age(self.spreadsheet_id, self.gid) is not None
+        saved = self.meta.get('urls', {}) if conditional and first_row == 1 and has_snapshot else {}
+
+        if len(urls) == 1:
+            response = self._get(session, urls[0], saved.get(urls[0]))
+            if response is None:
+                self.snapshots.touch(self.spreadsheet_id, self.gid)
+                return None
+            rows = csv.reader(iter_text_lines(self._iter_chunks(response)))
+            return self._iter_rows(response, rows, names, first_row)
+
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            runs = list(executor.map(lambda url: self._get_rows(session, url, saved.get(url)), urls))
+            if all(run is None for run in runs):
+                self.snapshots.touch(self.spreadsheet_id, self.gid)
+                return None
+
+            # Ranges that did not change come from the snapshot, or are downloaded again without it
+            snapshot = self._load_snapshot() if any(run is None for run in runs) else None
+            for i, (url, run_names) in enumerate(plan):
+                if runs[i] is None:
+                    runs[i] = self._snapshot_run(snapshot, run_names) or self._get_rows(session, url, None)
+
+        return self._iter_rows(None, self._join_runs(runs), names, first_row)
+
+    def _get(self, session, url, validators):
+        headers = {}
+        if validators and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators and validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        response = session.get(url, headers=headers, stream=True)
+        with self.lock:
+            self.requests += 1
+            self.not_modified += response.status_code == 304
+        if response.status_code == 304:
+            response.close()
+            return None
+        response.raise_for_status()
+
+        self.validators[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        return response
+
+    def _iter_chunks(self, response):
+        for chunk in response.iter_content(CHUNK_SIZE):
+            with self.lock:
+                self.downloaded_bytes += len(chunk)
+            yield chunk
+
+    def _get_rows(self, session, url, validators):
+        response = self._get(session, url, validators)
+        if response is None:
+            return None
+        with response:
+            return list(csv.reader(iter_text_lines(self._iter_chunks(response))))
+
+    def _get_header(self, session):
+        rows = self._get_rows(session, export_url(self.spreadsheet_id, self.gid, '1:1'), None)
+        return rows[0] if rows else []
+
+    def _snapshot_run(self, snapshot, run_names):
+        # The columns of one range, cut out of the snapshot rows
+        if not snapshot or not all(name in snapshot[0] for name in run_names):
+            return None
+        indices = [snapshot[0].index(name) for name in run_names]
+        return [[row[index] if index < len(row) else '' for index in indices] for row in snapshot]
+
+    @staticmethod
+    def _join_runs(runs):
+        widths = [max((len(row) for row in run), default=0) for run in runs]
+        joined = []
+        for i in range(max(len(run) for run in runs)):
+            row = []
+            for run, width in zip(runs, widths):
+                cells = run[i] if i < len(run) else []
+                row.extend(cells + [''] * (width - len(cells)))
+            joined.append(row)
+        return joined
+
+    def _iter_rows(self, response, rows, names, first_row):
+        saved_rows = []
+        if first_row > 1:
+            # Rows past the watermark come without the header row
+            saved_rows.append(names)
+            yield names
+        try:
+            for row in rows:
+                saved_rows.append(row)
+                yield row
+        finally:
+            if response is not None:
+                response.close()
+
+        self.rows_seen = first_row - 1 + len(saved_rows) - (1 if first_row > 1 else 0)
+        if self.snapshots and first_row == 1:
+            # The snapshot is only saved once the whole table arrived
+            self.snapshots.save(self.spreadsheet_id, self.gid, saved_rows, self.columns)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'downloaded_bytes': self.downloaded_bytes,
+            }
+
+    def read_saved(self):
+        """Rows of the snapshot saved by the last fetch(), None when there is none."""
+        rows = self._load_snapshot()
+        return iter(rows) if rows is not None else None
+
+    def commit(self):
+        # Only a complete download is worth revalidating, and without validators Google can only answer 200
+        if not self.meta_path or self.rows_seen is None:
+            return
+        urls = dict(self.meta.get('urls', {}))
+        if not self.new_rows_only:
+            urls.update((url, validators) for url, validators in self.validators.items()
+                        if validators['etag'] or validators['last_modified'])
+        meta = {'version': META_VERSION, 'urls': urls, 'rows': self.rows_seen}
+        write_atomic(self.meta_path, json.dumps(meta).encode('utf-8'))
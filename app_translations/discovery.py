@@ -0,0 +1,145 @@
+"""Resource file discovery shared by the exporters."""
+import fnmatch
+import json
+import os
+
+from .files import write_atomic
+
+ANDROID_RESOURCE = 'strings.xml'
+IOS_RESOURCE = 'Localizable.strings'
+
+# Directories that never hold source resources but are expensive to walk
+DEFAULT_IGNORE_PATTERNS = [
+    '.git',
+    '.gradle',
+    '.idea',
+    'build',
+    'Pods',
+    'Carthage',
+    'DerivedData',
+    'node_modules',
+    '*.xcassets',
+    '.translations-cache',
+]
+
+MANIFEST_VERSION = 2
+
+
+def is_ignored(dirpath, walk_root, ignore_patterns):
+    # Patterns match the directory name ("build"), its path below the walked root ("app/build")
+    # or its path as passed on the command line ("android/app/build")
+    candidates = (
+        os.path.basename(dirpath),
+        os.path.relpath(dirpath, walk_root),
+        os.path.normpath(dirpath),
+    )
+    return any(fnmatch.fnmatch(candidate, pattern) for pattern in ignore_patterns for candidate in candidates)
+
+
+def _contains(parent, child):
+    parent = os.path.abspath(parent)
+    child = os.path.abspath(child)
+    return child == parent or child.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+def _walk_roots(sources):
+    # Walk each directory once even when one source folder sits inside another
+    roots = []
+    for source in sources:
+        if any(_contains(root, source) for root in roots):
+            continue
+        roots = [root for root in roots if not _contains(source, root)] + [source]
+    return roots
+
+
+def _walk(android_sources, ios_sources, ignore_patterns):
+    dir_mtimes = {}
+    android_files = {}
+    ios_files = {}
+
+    for walk_root in _walk_roots([android_sources, ios_sources]):
+        if not os.path.isdir(walk_root):
+            # A missing source folder is recorded too, the manifest is stale as soon as it appears
+            dir_mtimes[walk_root] = None
+            continue
+        for root, dirnames, filenames in os.walk(walk_root):
+            dir_mtimes[root] = os.stat(root).st_mtime_ns
+
+            # Prune in place so os.walk never descends into ignored directories
+            dirnames[:] = [d for d in dirnames if not is_ignored(os.path.join(root, d), walk_root, ignore_patterns)]
+
+            for filename in filenames:
+                file_path = os.path.join(root, filename)
+                if filename == ANDROID_RESOURCE and _contains(android_sources, file_path):
+                    android_files[file_path] = os.stat(file_path).st_mtime_ns
+                elif filename == IOS_RESOURCE and _contains(ios_sources, file_path):
+                    ios_files[file_path] = os.stat(file_path).st_mtime_ns
+
+    return dir_mtimes, android_files, ios_files
+
+
+def _manifest_key(android_sources, ios_sources, ignore_patterns):
+    return {
+        'cwd': os.getcwd(),
+        'android': android_sources,
+        'ios': ios_sources,
+        'ignore': list(ignore_patterns),
+    }
+
+
+def load_manifest(manifest_path, key):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('key') != key:
+        return None
+
+    # Adding, removing or renaming an entry bumps the mtime of its directory,
+    # so unchanged directory mtimes mean the set of resource files is unchanged
+    for dirpath, mtime in manifest['dirs'].items():
+        if mtime is None:
+            if os.path.isdir(dirpath):
+                return None
+            continue
+        try:
+            if os.stat(dirpath).st_mtime_ns != mtime:
+                return None
+        except OSError:
+            return None
+
+    return manifest
+
+
+def save_manifest(manifest_path, manifest):
+    write_atomic(manifest_path, json.dumps(manifest).encode('utf-8'))
+
+
+def discover_resource_files(android_sources, ios_sources, ignore_patterns=None, manifest_path=None):
+    """Return (android_files, ios_files), the strings.xml and Localizable.strings paths below each source.
+
+    Both platforms are found in a single pruned walk. Directories matching
+    DEFAULT_IGNORE_PATTERNS or ignore_patterns are never entered. When
+    manifest_path is given the result is saved there together with the
+    directory and file mtimes, and later runs reuse it without walking the
+    tree as long as no walked directory changed.
+    """
+    ignore_patterns = DEFAULT_IGNORE_PATTERNS + list(ignore_patterns or [])
+    key = _manifest_key(android_sources, ios_sources, ignore_patterns)
+
+    manifest = load_manifest(manifest_path, key) if manifest_path else None
+    if manifest is None:
+        dir_mtimes, android_files, ios_files = _walk(android_sources, ios_sources, ignore_patterns)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'key': key,
+            'dirs': dir_mtimes,
+            'android': android_files,
+            'ios': ios_files,
+        }
+        if manifest_path:
+            save_manifest(manifest_path, manifest)
+
+    return list(manifest['android']), list(manifest['ios'])
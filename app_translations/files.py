@@ -0,0 +1,37 @@
+"""File system helpers shared by the scripts."""
+import os
+import secrets
+import shutil
+
+
+def _create_temporary(directory, name):
+    # Like tempfile.mkstemp, but with the 0666 mode of open() so the umask applies instead of a fixed 0600
+    while True:
+        tmp_path = os.path.join(directory, f'.{name}.{secrets.token_hex(4)}')
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def write_atomic(file_path, data):
+    """Replace file_path with data (bytes) so readers never see a partially written file.
+
+    The data goes to a temporary file in the same directory which is then
+    renamed over the target, keeping the permissions of the file it replaces.
+    New files get the permissions open() would give them under the umask.
+    """
+    directory = os.path.dirname(file_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = _create_temporary(directory, os.path.basename(file_path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,242 @@
+"""iOS Localizable.strings resource helpers."""
+import codecs
+import os
+import re
+from itertools import accumulate
+from operator import add
+
+from . import UNTRANSLATED
+from .files import write_atomic
+
+# One token per "key" = "value"; entry or comment, matched in a single scan over the whole buffer.
+# Strings use the unrolled [^"\\]*(?:\\.[^"\\]*)* form so escaped quotes never end them and the
+# engine does not alternate per character. Comments are matched only so their content is skipped.
+# Quoted keys come first as they are by far the most common, unquoted (bare) keys are still accepted.
+_STRINGS_TOKEN = re.compile(r'''
+    "(?P<key>[^"\\]*(?:\\.[^"\\]*)*)" \s*=\s* "(?P<value>[^"\\]*(?:\\.[^"\\]*)*)" \s*;
+  | /\*.*?\*/
+  | //[^\n]*
+  | (?P<bare_key>[A-Za-z_][\w.\-$:/]*) \s*=\s* "(?P<bare_value>[^"\\]*(?:\\.[^"\\]*)*)" \s*;
+''', re.S | re.X)
+
+# An escape sequence, kept as it is, or what a literal cannot hold as is: a bare quote or a trailing backslash
+_UNESCAPED = re.compile(r'(\\.)|"|\\$', re.S)
+
+# Block comments closed on the line they start, the only ones the split fast path accepts
+_ONE_LINE_COMMENT = re.compile(r'/\*[^\n]*?\*/')
+
+
+def decode_strings(data):
+    """Decode the bytes of a .strings file, returning (text, encoding).
+
+    Xcode writes UTF-8 or UTF-16 with a byte order mark. UTF-16 without a mark
+    is recognised by the NUL byte of the first ASCII character.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    elif data.startswith(codecs.BOM_UTF16_LE) or data.startswith(codecs.BOM_UTF16_BE):
+        encoding = 'utf-16'
+    elif len(data) >= 2 and data[0] == 0:
+        encoding = 'utf-16-be'
+    elif len(data) >= 2 and data[1] == 0:
+        encoding = 'utf-16-le'
+    else:
+        encoding = 'utf-8'
+    return data.decode(encoding), encoding
+
+
+def _split_plain(text):
+    """Split a .strings buffer on its quotes when every entry is a plain "key" = "value";, else return None.
+
+    This is what Xcode and the importers write, and str.split is several times
+    faster than any regex over it. Piece 4n+1 is a key and 4n+3 its value.
+    The buffer qualifies when no quote is escaped, every block comment ends on
+    its line, each key starts a line and is followed by '=' and its value,
+    and each value by ';'. _STRINGS_TOKEN then finds the same entries.
+    """
+    if '\\"' in text:
+        return None
+    if '/*' in text and len(_ONE_LINE_COMMENT.findall(text)) != text.count('/*'):
+        return None
+
+    pieces = text.split('"')
+    if len(pieces) % 4 != 1 or (pieces[0] and not pieces[0].endswith('\n')):
+        return None
+    if any(separator.strip() != '=' for separator in set(pieces[2::4])):
+        return None
+    # What follows a value, up to the next key: ';' then comments and blank lines, or the end of the file
+    between = pieces[4::4]
+    if between and not between[-1].startswith(';'):
+        return None
+    if any(not (piece.startswith(';') and piece.endswith('\n')) for piece in set(between[:-1])):
+        return None
+    return pieces
+
+
+def iter_strings_entries(text):
+    """Yield (key, value, span) for every entry of a .strings buffer in a single pass.
+
+    key and value are returned exactly as written between the quotes, escape
+    sequences included, which is also what the importers write back. span is
+    the (start, end) offset of the whole entry in text. Comments are skipped,
+    values may contain '=', ';', escaped quotes and line breaks.
+    """
+    pieces = _split_plain(text)
+    if pieces is not None:
+        # An entry spans from the quote before its key (quote 4n) to the ';' after its value (quote 4n+3)
+        ends = list(accumulate(map(len, pieces)))
+        count = len(pieces)
+        starts = list(map(add, ends[0::4], range(0, count, 4)))
+        stops = list(map(add, ends[3::4], range(5, count + 5, 4)))
+        keys, values = pieces[1::4], pieces[3::4]
+        # Only the lists still needed stay alive, the garbage collector walks them on every full collection
+        del pieces, ends
+        yield from zip(keys, values, zip(starts, stops))
+        return
+
+    for match in _STRINGS_TOKEN.finditer(text):
+        key, value, bare_key, bare_value = match.group(1, 2, 3, 4)
+        if bare_key is not None:
+            yield bare_key, bare_value, match.span()
+        elif value is not None:
+            yield key, value, match.span()
+
+
+def parse_strings(text):
+    """Return an iterable of the (key, value) pairs of a .strings buffer, like iter_strings_entries without spans.
+
+    Plain files are zipped straight from the split pieces, other files go
+    through findall, which builds the tuples in C.
+    """
+    pieces = _split_plain(text)
+    if pieces is not None:
+        return zip(pieces[1::4], pieces[3::4])
+    return [(bare_key, bare_value) if bare_key else (key, value)
+            for key, value, bare_key, bare_value in _STRINGS_TOKEN.findall(text)
+            if key or value or bare_key]
+
+
+def read_strings_file(file_path):
+    with open(file_path, 'rb') as f:
+        text, _ = decode_strings(f.read())
+    return parse_strings(text)
+
+
+def escape_literal(value):
+    """Escape the bare quotes and a trailing backslash of value so it can be written between quotes.
+
+    Escape sequences already in value, as the exporters read them from the
+    files, are left as they are, so escaping twice changes nothing.
+    """
+    return _UNESCAPED.sub(lambda match: match.group(1) or '\\' + match.group(0), value)
+
+
+def format_entry(key, value):
+    return "\"{}\" = \"{}\";\n".format(escape_literal(key), escape_literal(value))
+
+
+class StringsDocument:
+    """A Localizable.strings file held in memory as its original text.
+
+    Every entry is indexed by key with its span in the text, a key may be
+    declared more than once. Adds and updates are applied without reading
+    the file again while comments, blank lines, ordering and the file
+    encoding are kept as they were. save() only writes when the content
+    actually changed.
+    """
+
+    def __init__(self, text='', encoding='utf-8'):
+        self.original = text
+        self.encoding = encoding
+        self.index = {}
+        for key, value, span in iter_strings_entries(text):
+            self.index.setdefault(key, []).append((value, span))
+        self.updates = {}
+        self.additions = []
+
+    @classmethod
+    def load(cls, file_path):
+        try:
+            with open(file_path, 'rb') as f:
+                return cls(*decode_strings(f.read()))
+        except FileNotFoundError:
+            return cls()
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, key):
+        # The value the app shows, the last declaration wins
+        entries = self.index.get(key)
+        return entries[-1][0] if entries is not None else None
+
+    def set(self, key, value):
+        """Add or update key, returning 'added', 'updated' or None when the value is unchanged.
+
+        Every declaration of a repeated key is updated. key and value are
+        compared with the file as they will be written, escaped.
+        """
+        key, value = escape_literal(key), escape_literal(value)
+        entries = self.index.get(key)
+        if entries is None:
+            self.index[key] = [(value, None)]
+            self.additions.append(key)
+            return 'added'
+
+        updated = False
+        for i, (current, span) in enumerate(entries):
+            if current.strip() != value:
+                entries[i] = (value, span)
+                if span is not None:
+                    self.updates[span] = (key, value)
+                updated = True
+        return 'updated' if updated else None
+
+    def render(self):
+        parts = []
+        position = 0
+        for (start, end), (key, value) in sorted(self.updates.items()):
+            parts.append(self.original[position:start])
+            # The entry span stops at ';', the line ending after it stays untouched
+            parts.append(format_entry(key, value)[:-1])
+            position = end
+        parts.append(self.original[position:])
+
+        if self.additions:
+            if parts[-1] and not parts[-1].endswith('\n'):
+                parts.append('\n')
+            parts.extend(format_entry(key, self.get(key)) for key in self.additions)
+
+        return ''.join(parts)
+
+    def save(self, file_path):
+        text = self.render()
+        if text == self.original and os.path.exists(file_path):
+            return False
+
+        write_atomic(file_path, text.encode(self.encoding))
+        return True
+
+
+def merge_ios_strings(strings_file, translations):
+    """Merge {key: value} translations for one language into strings_file, creating it when missing.
+
+    The file is read once, changes are applied to a StringsDocument and the
+    file is written at most once. Empty and UNTRANSLATED values are skipped.
+
+    Returns the changes as a list of ('added' | 'updated', key, value).
+    """
+    document = StringsDocument.load(strings_file)
+
+    changes = []
+    for key, value in translations.items():
+        excel_value = str(value).strip() if value else None
+        if excel_value is None or excel_value == UNTRANSLATED:
+            continue
+
+        action = document.set(key, excel_value)
+        if action is not None:
+            changes.append((action, key, excel_value))
+
+    document.save(strings_file)
+    return changes
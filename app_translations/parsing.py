@@ -0,0 +1,84 @@
+"""Parsing of Android and iOS resource files into translation tables, shared by the exporters."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import UNTRANSLATED
+from .android import iter_android_strings
+from .ios import read_strings_file
+
+
+def process_android_file(file_path, language_name):
+    translations = {}
+    for key, text, translatable in iter_android_strings(file_path):
+        if not translatable:
+            continue
+
+        value = text.strip() if text else UNTRANSLATED
+        translations[key] = value
+
+    return language_name, translations
+
+
+def process_ios_file(file_path, language_name):
+    translations = {}
+    for key, value in read_strings_file(file_path):
+        translations[key] = value.strip()
+
+    return language_name, translations
+
+
+def map_resource_languages(file_paths, language_mapper):
+    # (file path, language name) pairs, folders missing from the mapper get their capitalized name
+    resource_files = []
+    for file_path in file_paths:
+        dirs = os.path.dirname(file_path).split("/")
+        lang = dirs[len(dirs) - 1]
+        language_name = language_mapper.get(lang, lang.capitalize())
+        resource_files.append((file_path, language_name))
+    return resource_files
+
+
+def parse_resource_files(process_file, resource_files, jobs=1, parse_cache=None, timings=None):
+    """Parse (file path, language name) pairs with process_file, returning (language name, translations) pairs.
+
+    Files unchanged since they were put in parse_cache are not parsed again.
+    With jobs other than 1 the files are parsed by a pool of processes (0
+    uses every core), the results keep the order of resource_files.
+    """
+    results = [None] * len(resource_files)
+
+    # Only files that changed since the last export need parsing
+    pending = []
+    for i, (file_path, language_name) in enumerate(resource_files):
+        translations = parse_cache.get(file_path) if parse_cache is not None else None
+        if translations is not None:
+            results[i] = (language_name, translations)
+        else:
+            pending.append(i)
+
+    file_paths = [resource_files[i][0] for i in pending]
+    language_names = [resource_files[i][1] for i in pending]
+    if timings is not None:
+        timings.count('files_parsed', len(file_paths))
+        for file_path in file_paths:
+            timings.count_file('bytes_read', file_path)
+    if jobs == 1 or len(pending) < 2:
+        parsed = map(process_file, file_paths, language_names)
+    else:
+        # executor.map yields results in submission order, so the merge sees the same order as the serial path
+        chunksize = max(1, len(pending) // ((jobs or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+            parsed = list(executor.map(process_file, file_paths, language_names, chunksize=chunksize))
+
+    for i, result in zip(pending, parsed):
+        results[i] = result
+        if parse_cache is not None:
+            parse_cache.put(resource_files[i][0], result[1])
+
+    return results
+
+
+def merge_translations(texts, results):
+    # Parsed files into a TranslationTable, a later file of the same language wins for repeated keys
+    for language_name, translations in results:
+        texts.update_locale(language_name, translations)
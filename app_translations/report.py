@@ -0,0 +1,32 @@
+"""Console report of the resource files written by the importers, shared by the import scripts."""
+import json
+
+
+def print_report(platform_name, results, updated_message, changes_header="\nChanges:", no_changes="No changes"):
+    """Print the (lang, (resource file, existed, changes)) results of one platform and a JSON summary of the changes.
+
+    updated_message is formatted with key, lang and value for every updated
+    key. Files that did not exist are only listed, all their keys are new.
+    """
+    changes_platform = {}
+    print(f"Processing localization files for {platform_name}:")
+    for lang, (resource_file, exists, changes) in results:
+        if not exists:
+            print(f"\nCreated and populated file: {resource_file}")
+            continue
+
+        print(f"\nFile: {resource_file}")
+        changes_platform[lang] = {}
+        for action, key, value in changes:
+            if action == 'added':
+                print(f"Added new key \"{key}\" to {lang} with value {value}")
+            else:
+                print(updated_message.format(key=key, lang=lang, value=value))
+            changes_platform[lang][key] = value
+
+    # Print information about the changes
+    print(changes_header)
+    if all(not changes for changes in changes_platform.values()):
+        print(no_changes)
+    else:
+        print(json.dumps(changes_platform, indent=2, ensure_ascii=False).encode('utf-8').decode())
@@ -0,0 +1,339 @@
+"""Google Sheets helpers shared by the google-sheets scripts."""
+import json
+import random
+import threading
+import time
+
+from . import UNTRANSLATED
+from .csvexport import column_letter
+from .files import write_atomic
+
+# Sheets API quota per user and per minute, for reads and writes alike
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_MAX_RETRIES = 6
+
+# Largest body sent in one values batchUpdate, Google recommends staying under 2 MB
+DEFAULT_MAX_PAYLOAD_BYTES = 2 * 1024 * 1024
+
+KEY_INDEX_VERSION = 1
+
+
+def is_rate_limit_error(error):
+    # gspread raises APIError with the HTTP response attached, older versions only expose the message
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    return status_code == 429 or 'RATE_LIMIT_EXCEEDED' in str(error)
+
+
+def is_retryable_api_error(error):
+    # Throttled gspread calls, other errors (including non gspread ones) are raised right away
+    from gspread.exceptions import APIError
+    return isinstance(error, APIError) and is_rate_limit_error(error)
+
+
+class RequestScheduler:
+    """Paces API calls with a token bucket and retries throttled calls with backoff.
+
+    The bucket allows a short burst and refills continuously so that no 60
+    second window goes over requests_per_minute. Calls run as fast as the
+    quota allows and only wait for the next token instead of a whole minute.
+    A throttled call halves the refill rate and is retried after an
+    exponential backoff with full jitter, the rate then recovers step by step
+    on success. After max_retries throttles in a row the error is raised.
+
+    Counters for requests, throttles and time spent waiting are kept for
+    reporting and the scheduler can be shared between threads.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, max_retries=DEFAULT_MAX_RETRIES,
+                 is_retryable=is_rate_limit_error, base_delay=1.0, max_delay=32.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        # Any 60 second window sees at most the burst plus a minute of refill, keep both within the quota
+        self.capacity = float(max(1, requests_per_minute // 6))
+        self.max_rate = max(requests_per_minute - self.capacity, 1) / 60.0
+        self.rate = self.max_rate
+        self.tokens = self.capacity
+        self.max_retries = max_retries
+        self.is_retryable = is_retryable
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+        self.requests = 0
+        self.throttles = 0
+        self.wait_seconds = 0.0
+
+    def _wait(self, seconds):
+        if seconds > 0:
+            self.sleep(seconds)
+            with self.lock:
+                self.wait_seconds += seconds
+
+    def acquire(self):
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take the token now, going negative reserves it for when the bucket refills
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.requests += 1
+        self._wait(wait)
+
+    def _throttled(self, attempt):
+        with self.lock:
+            self.throttles += 1
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+        self._wait(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def _succeeded(self):
+        if self.rate < self.max_rate:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 16)
+
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not self.is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                self._throttled(attempt)
+                attempt += 1
+                continue
+
+            self._succeeded()
+            return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'throttles': self.throttles,
+                'wait_seconds': round(self.wait_seconds, 3),
+            }
+
+
+class KeyIndexCache:
+    """On-disk copy of the key column and header row of each worksheet.
+
+    Entries are tagged with the modified time of the spreadsheet read before
+    downloading them and are only returned while the spreadsheet still has
+    that modified time. Any edit, including the exporter's own writes, makes
+    the next run download the worksheet keys again.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.entries = self._load()
+        self.dirty = False
+        # Both worksheets are opened on different threads
+        self.lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get('version') != KEY_INDEX_VERSION:
+            return {}
+        return data['entries']
+
+    def get(self, spreadsheet_id, index, modified_time):
+        # (key_column, header_row) as col_values(1) and row_values(1) returned them, None when stale
+        entry = self.entries.get(f'{spreadsheet_id}/{index}')
+        if entry is None or modified_time is None or entry['modified'] != modified_time:
+            return None
+        return entry['key_column'], entry['header_row']
+
+    def put(self, spreadsheet_id, index, modified_time, key_column, header_row):
+        if modified_time is None:
+            return
+        with self.lock:
+            self.entries[f'{spreadsheet_id}/{index}'] = {
+                'modified': modified_time,
+                'key_column': key_column,
+                'header_row': header_row,
+            }
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = json.dumps({'version': KEY_INDEX_VERSION, 'entries': self.entries}, ensure_ascii=False)
+        write_atomic(self.cache_path, data.encode('utf-8'))
+        self.dirty = False
+
+
+def build_rows(keys, texts, language_names):
+    # One sheet row per key, the key in column A followed by a cell per language
+    return [[key] + texts.values(key, language_names, UNTRANSLATED) for key in keys]
+
+
+def chunk_value_ranges(blocks, max_bytes):
+    # Turn (first_row, first_col, rows) blocks into lists of value ranges, each list one request body under max_bytes
+    chunk = []
+    chunk_bytes = 0
+    for first_row, first_col, rows in blocks:
+        start = 0
+        for offset, row in enumerate(rows):
+            row_bytes = sum(len(str(value).encode('utf-8')) + 4 for value in row)
+            if chunk_bytes + row_bytes > max_bytes and (chunk or offset > start):
+                if offset > start:
+                    chunk.append({'range': f'{column_letter(first_col)}{first_row + start}',
+                                  'values': rows[start:offset]})
+                yield chunk
+                chunk = []
+                chunk_bytes = 0
+                start = offset
+            chunk_bytes += row_bytes
+        if start < len(rows):
+            chunk.append({'range': f'{column_letter(first_col)}{first_row + start}', 'values': rows[start:]})
+    if chunk:
+        yield chunk
+
+
+def update_values(worksheet, data):
+    # gspread prefixes the ranges with the sheet title in place, a retried call must start from the original ones
+    return worksheet.batch_update([dict(value_range) for value_range in data], value_input_option='USER_ENTERED')
+
+
+def write_blocks(scheduler, worksheet, blocks, max_payload_bytes=DEFAULT_MAX_PAYLOAD_BYTES):
+    """Write (first_row, first_col, rows) blocks with batched values updates.
+
+    Everything goes in a single values batchUpdate request unless the payload
+    is larger than max_payload_bytes, in which case it is split in chunks.
+    """
+    if not blocks:
+        return
+
+    # Grow the grid first, values updates past the last row or column are rejected
+    needed_rows = max(first_row + len(rows) - 1 for first_row, _, rows in blocks)
+    needed_cols = max(first_col + max(len(row) for row in rows) - 1 for _, first_col, rows in blocks)
+    if needed_rows > worksheet.row_count or needed_cols > worksheet.col_count:
+        scheduler.call(worksheet.resize, rows=max(needed_rows, worksheet.row_count),
+                       cols=max(needed_cols, worksheet.col_count))
+
+    for data in chunk_value_ranges(blocks, max_payload_bytes):
+        scheduler.call(update_values, worksheet, data)
+
+
+def write_new_rows(scheduler, worksheet, header, first_row, rows, max_payload_bytes=DEFAULT_MAX_PAYLOAD_BYTES):
+    # Header (when not None) in B1 and the new rows starting at first_row
+    blocks = []
+    if header is not None:
+        blocks.append((1, 2, [header]))
+    if rows:
+        blocks.append((first_row, 1, rows))
+    write_blocks(scheduler, worksheet, blocks, max_payload_bytes)
+
+
+def diff_blocks(values, texts, language_names):
+    """Compare a whole worksheet (get_all_values) with the local table.
+
+    Returns the blocks to write and the number of changed cells and new keys.
+    Missing languages get a new header column, rows for new keys are appended
+    and existing rows only get the cells whose local value differs. Local
+    UNTRANSLATED values never overwrite what is in the sheet.
+    """
+    header_row = values[0] if values else []
+    blocks = []
+
+    def add_cell(row, col, value):
+        # Neighbouring changed cells of a row are sent as one range
+        if blocks and blocks[-1][0] == row and blocks[-1][1] + len(blocks[-1][2][0]) == col:
+            blocks[-1][2][0].append(value)
+        else:
+            blocks.append((row, col, [[value]]))
+
+    # Column (1-based) of every language, new ones are added after the last header column
+    language_columns = {}
+    next_col = max(len(header_row), 1) + 1
+    for lang_key in language_names:
+        if lang_key in header_row[1:]:
+            language_columns[lang_key] = header_row.index(lang_key, 1) + 1
+        else:
+            language_columns[lang_key] = next_col
+            add_cell(1, next_col, lang_key)
+            next_col += 1
+
+    changed_cells = 0
+    keys_from_sheet = set()
+    for row_number, row in enumerate(values[1:], start=2):
+        key = row[0] if row else ''
+        if not key:
+            continue
+        keys_from_sheet.add(key)
+        if key not in texts:
+            continue
+
+        changed = {}
+        for lang_key, col in language_columns.items():
+            local_value = texts.get(key, lang_key, UNTRANSLATED)
+            sheet_value = row[col - 1] if col - 1 < len(row) else ''
+            if local_value != UNTRANSLATED and local_value != sheet_value:
+                changed[col] = local_value
+
+        for col in sorted(changed):
+            add_cell(row_number, col, changed[col])
+        changed_cells += len(changed)
+
+    new_keys = [key for key in texts if key not in keys_from_sheet]
+    if new_keys:
+        width = max(language_columns.values())
+        rows = []
+        for key in new_keys:
+            row = [''] * width
+            row[0] = key
+            for lang_key, col in language_columns.items():
+                row[col - 1] = texts.get(key, lang_key, UNTRANSLATED)
+            rows.append(row)
+        # Row 1 is the header even on an empty worksheet
+        blocks.append((max(len(values), 1) + 1, 1, rows))
+
+    return blocks, changed_cells, new_keys
+
+
+def spreadsheet_modified_time(scheduler, spreadsheet):
+    from gspread.exceptions import APIError
+    try:
+        return scheduler.call(spreadsheet.get_lastUpdateTime)
+    except APIError:
+        # Drive API not enabled for the service account, the worksheet keys are downloaded every time
+        return None
+
+
+def open_worksheet(scheduler, spreadsheet, index, title, sync_mode, key_index=None, modified_time=None):
+    """The worksheet at index (created as title when missing) and what the sync needs from it.
+
+    That is every value of the worksheet for the diff sync, or its key column
+    and header row, from key_index while the spreadsheet is unchanged.
+    """
+    from gspread.exceptions import WorksheetNotFound
+    try:
+        worksheet = scheduler.call(spreadsheet.get_worksheet, index)
+    except WorksheetNotFound:
+        worksheet = scheduler.call(spreadsheet.add_worksheet, title=title, rows=1000, cols=1000)
+
+    if sync_mode == 'diff':
+        # The whole worksheet in one bulk read
+        return worksheet, scheduler.call(worksheet.get_all_values)
+
+    # Nobody touched the spreadsheet since the last export, its keys are known already
+    cached = key_index.get(spreadsheet.id, index, modified_time) if key_index is not None else None
+    if cached is not None:
+        return worksheet, cached
+
+    key_column = scheduler.call(worksheet.col_values, 1)
+    header_row = scheduler.call(worksheet.row_values, 1)
+    if key_index is not None:
+        key_index.put(spreadsheet.id, index, modified_time, key_column, header_row)
+    return worksheet, (key_column, header_row)
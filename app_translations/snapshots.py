@@ -0,0 +1,60 @@
+"""Local snapshots of downloaded worksheets, shared by the google-sheets importers."""
+import json
+import os
+import time
+
+from .files import write_atomic
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotStore:
+    """The last downloaded rows of every worksheet, one file per spreadsheet and gid.
+
+    Rows are stored as plain JSON arrays, already split in cells, so reading
+    a snapshot needs neither the network nor the CSV parser. load() takes a
+    max_age in seconds to decide whether a snapshot is still fresh enough,
+    None accepts a snapshot of any age. Snapshots of a column selection
+    are saved and loaded with the same columns.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def path(self, spreadsheet_id, gid):
+        return os.path.join(self.cache_dir, f'snapshot-{spreadsheet_id}-{gid}.json')
+
+    def age(self, spreadsheet_id, gid):
+        # Seconds since the snapshot was saved, None when there is none
+        try:
+            return max(0.0, time.time() - os.stat(self.path(spreadsheet_id, gid)).st_mtime)
+        except OSError:
+            return None
+
+    def load(self, spreadsheet_id, gid, max_age=None, columns=None):
+        age = self.age(spreadsheet_id, gid)
+        if age is None or (max_age is not None and age > max_age):
+            return None
+
+        try:
+            with open(self.path(spreadsheet_id, gid), encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # A snapshot of other columns than the ones asked for is of no use
+        if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('columns') != columns:
+            return None
+        return snapshot['rows']
+
+    def save(self, spreadsheet_id, gid, rows, columns=None):
+        snapshot = {'version': SNAPSHOT_VERSION, 'columns': columns, 'rows': rows}
+        data = json.dumps(snapshot, ensure_ascii=False, separators=(',', ':'))
+        write_atomic(self.path(spreadsheet_id, gid), data.encode('utf-8'))
+
+    def touch(self, spreadsheet_id, gid):
+        # The worksheet did not change, the snapshot is as fresh as a new download
+        try:
+            os.utime(self.path(spreadsheet_id, gid))
+        except OSError:
+            pass
@@ -0,0 +1,128 @@
+"""Compact in-memory translation table shared by the exporters and importers."""
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class TranslationTable:
+    """Translations by key and locale, stored column by column.
+
+    Keys and locales are interned and numbered in insertion order. Each
+    locale owns one list of values indexed by the key number, holding None
+    where the key has no value, so no dict is allocated per key and locale
+    names are stored once instead of in every row. Columns are only padded
+    up to the last key that has a value in them.
+    """
+
+    def __init__(self, locales=()):
+        self.keys = []
+        self.key_rows = {}
+        self.locales = []
+        self.locale_columns = {}
+        self.columns = []
+        for locale in locales:
+            self.add_locale(locale)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __contains__(self, key):
+        return key in self.key_rows
+
+    def add_key(self, key):
+        row = self.key_rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            key = _intern(key)
+            self.keys.append(key)
+            self.key_rows[key] = row
+        return row
+
+    def add_locale(self, locale):
+        col = self.locale_columns.get(locale)
+        if col is None:
+            col = len(self.locales)
+            locale = _intern(locale)
+            self.locales.append(locale)
+            self.locale_columns[locale] = col
+            self.columns.append([])
+        return col
+
+    def set(self, key, locale, value):
+        row = self.add_key(key)
+        column = self.columns[self.add_locale(locale)]
+        if row >= len(column):
+            if value is None:
+                return
+            column.extend([None] * (row + 1 - len(column)))
+        column[row] = value
+
+    def get(self, key, locale, default=None):
+        row = self.key_rows.get(key)
+        col = self.locale_columns.get(locale)
+        if row is None or col is None:
+            return default
+        column = self.columns[col]
+        value = column[row] if row < len(column) else None
+        return default if value is None else value
+
+    def values(self, key, locales, default=None):
+        # The values of one key for locales, in that order
+        return [self.get(key, locale, default) for locale in locales]
+
+    def iter_rows(self, locales=None, default=None):
+        """Yield (key, [value per locale]) in key order, default where a value is missing."""
+        locales = self.locales if locales is None else locales
+        columns = [self.columns[self.locale_columns[locale]] if locale in self.locale_columns else []
+                   for locale in locales]
+        for row, key in enumerate(self.keys):
+            values = []
+            for column in columns:
+                value = column[row] if row < len(column) else None
+                values.append(default if value is None else value)
+            yield key, values
+
+    def locale_items(self, locale):
+        """Yield (key, value) for every key with a value in locale."""
+        col = self.locale_columns.get(locale)
+        if col is None:
+            return
+        for key, value in zip(self.keys, self.columns[col]):
+            if value is not None:
+                yield key, value
+
+    def update_locale(self, locale, translations):
+        # Bulk set of a {key: value} mapping for one locale, e.g. one parsed resource file
+        for key, value in translations.items():
+            self.set(key, locale, value)
+
+    def update(self, other):
+        # Keys of other replace their values for the locales of other, like dict.update per row
+        for col, locale in enumerate(other.locales):
+            column = other.columns[col]
+            for row, key in enumerate(other.keys):
+                self.set(key, locale, column[row] if row < len(column) else None)
+        for key in other.keys:
+            self.add_key(key)
+
+    def memory_usage(self):
+        """Approximate bytes held by the table: containers, keys, locales and distinct values."""
+        total = sum(sys.getsizeof(container) for container in (self.keys, self.key_rows, self.locales,
+                                                                self.locale_columns, self.columns))
+        seen = set()
+        for value in self.keys + self.locales:
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+        for column in self.columns:
+            total += sys.getsizeof(column)
+            for value in column:
+                if value is not None and id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+        return total
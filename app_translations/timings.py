@@ -0,0 +1,94 @@
+"""Per-phase wall time and counters of one script run, reported by the scripts' -timings flag."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .files import write_atomic
+
+
+def file_size(file_path):
+    # None when the file does not exist
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
+
+
+class Timings:
+    """Wall time of each phase and counters of one script run.
+
+    Phases are timed with the phase() context manager and add up when a
+    phase runs more than once, counters are added with count(). Both can be
+    used from several threads, phases running at the same time each report
+    their own wall time. report() returns the document emit() prints or
+    writes as JSON.
+    """
+
+    def __init__(self, script=None):
+        self.script = script
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def timed(self, name, func, *args, **kwargs):
+        # func(*args, **kwargs) timed as phase name, for work handed to an executor
+        with self.phase(name):
+            return func(*args, **kwargs)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_file(self, name, file_path):
+        # Adds the size of file_path to the bytes counter name
+        size = file_size(file_path)
+        if size is not None:
+            self.count(name, size)
+
+    def count_stats(self, prefix, stats):
+        # Counters of a RequestScheduler or CsvExport, e.g. api_requests for requests
+        for name, value in stats.items():
+            self.count(f'{prefix}_{name}', value)
+
+    def count_merge(self, file_path, size_before, translations, changes):
+        """Counters of one resource file merged by an importer, size_before is None for a new file."""
+        if size_before is not None:
+            self.count('files_read')
+            self.count('bytes_read', size_before)
+        self.count('keys_processed', len(translations))
+        self.count('keys_added', sum(1 for action, _, _ in changes if action == 'added'))
+        self.count('keys_updated', sum(1 for action, _, _ in changes if action == 'updated'))
+        if changes or size_before is None:
+            self.count('files_written')
+            self.count_file('bytes_written', file_path)
+
+    def report(self):
+        with self.lock:
+            return {
+                'script': self.script,
+                'total_seconds': round(time.perf_counter() - self.started, 4),
+                'phases': {name: round(seconds, 4) for name, seconds in self.phases.items()},
+                'counters': {name: round(value, 4) if isinstance(value, float) else value
+                             for name, value in sorted(self.counters.items())},
+            }
+
+    def emit(self, destination):
+        # '-' prints the report after the script output, anything else is a file path
+        data = json.dumps(self.report(), indent=2)
+        if destination == '-':
+            print(data)
+        else:
+            write_atomic(destination, (data + '\n').encode('utf-8'))
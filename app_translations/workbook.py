@@ -0,0 +1,71 @@
+"""Excel workbook helpers shared by the local scripts.
+
+openpyxl and xlsxwriter are only imported when a workbook is read or
+written, importing this module stays cheap.
+"""
+from . import UNTRANSLATED
+from .table import TranslationTable
+
+
+def read_sheet_translations(sheet, language_mapper):
+    """Return a TranslationTable of a worksheet with keys in column A and languages in row 1."""
+    rows = sheet.iter_rows(values_only=True)
+
+    # Map the header once, column index -> language folder
+    header = next(rows, ())
+    language_columns = [(col, language_mapper[name]) for col, name in enumerate(header)
+                        if col > 0 and name in language_mapper]
+
+    texts = TranslationTable(lang for _, lang in language_columns)
+    for row in rows:
+        key = row[0] if row else None
+        if key is None:
+            continue
+
+        texts.add_key(key)
+        for col, lang in language_columns:
+            texts.set(key, lang, row[col] if col < len(row) else None)
+
+    return texts
+
+
+def load_workbook_translations(excel_file, language_mappers):
+    """Read every {sheet name: language mapper} of excel_file with a single workbook load.
+
+    The workbook is opened in read-only mode and its rows are streamed with
+    iter_rows(values_only=True), so the cell object model is never built.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True)
+    try:
+        return {name: read_sheet_translations(workbook[name], language_mapper)
+                for name, language_mapper in language_mappers.items()}
+    finally:
+        workbook.close()
+
+
+def write_worksheet(workbook, name, texts, language_names):
+    worksheet = workbook.add_worksheet(name)
+
+    # Write headers, column A is reserved for the keys
+    worksheet.write_row(0, 1, language_names)
+
+    # Write data, one whole row per key using numeric (row, col) addressing
+    for row, (key, values) in enumerate(texts.iter_rows(language_names, UNTRANSLATED), start=1):
+        worksheet.write_string(row, 0, key)
+        worksheet.write_row(row, 1, values)
+
+
+def write_translations_workbook(excel_file, sheets):
+    """Write every {sheet name: (texts, language names)} of sheets to excel_file, in order.
+
+    constant_memory flushes every row to disk once the next one starts, so
+    rows are written in order and the workbook never holds the whole table.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(excel_file, {'constant_memory': True})
+    for name, (texts, language_names) in sheets.items():
+        write_worksheet(workbook, name, texts, language_names)
+    workbook.close()
@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import argparse
+
+# Shared helpers live in the app_translations package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.batch import load_manifest, run_batch
+from app_translations.files import write_atomic
+from app_translations.sheets import DEFAULT_MAX_RETRIES, DEFAULT_REQUESTS_PER_MINUTE
+from app_translations.timings import Timings
+
+manifestPath = "translations-batch.json"
+cacheDir = ".translations-cache"
+
+# Use credentials JSON file for authentication of the Google Sheets exports
+# (replace 'secure/service_account.json' with your actual JSON file)
+credentials_file = 'secure/service_account.json'
+
+
+def project_summary(action, entry):
+    # One line per project of the aggregated report
+    if entry['status'] == 'failed':
+        return f"FAILED {entry['error']}"
+    if entry['status'] == 'unchanged':
+        return "The Google Sheet did not change since the last import, nothing to do"
+    if action == 'export' and 'workbook' in entry:
+        return (f"{entry['android']['keys']} Android and {entry['ios']['keys']} iOS keys exported to "
+                f"{entry['workbook']}")
+    if action == 'export':
+        changed_cells = [entry[platform]['changed_cells'] for platform in ('android', 'ios')]
+        changed = f", {sum(changed_cells)} changed cells updated" if None not in changed_cells else ''
+        return (f"{len(entry['android']['new_keys'])} new Android and {len(entry['ios']['new_keys'])} new iOS keys"
+                f"{changed} in {entry['url']}")
+
+    files = [lang_report for platform in ('android', 'ios') for lang_report in entry.get(platform, {}).values()]
+    return (f"{sum(len(f['added']) for f in files)} keys added, {sum(len(f['updated']) for f in files)} updated, "
+            f"{sum(f['created'] for f in files)} files created")
+
+
+def print_report(report):
+    action = report['action']
+    width = max((len(name) for name in report['projects']), default=0)
+    for name, entry in report['projects'].items():
+        print(f"{name:<{width}}  {project_summary(action, entry)}  ({entry['seconds']}s)")
+
+    totals = report['totals']
+    print(f"\n{totals['projects']} projects: {totals['ok']} done, {totals['unchanged']} unchanged, "
+          f"{totals['failed']} failed")
+    if action == 'export':
+        print(f"{totals['keys']} keys exported to workbooks, {totals['new_keys']} new keys and "
+              f"{totals['changed_cells']} changed cells in Google Sheets")
+    else:
+        print(f"{totals['keys_added']} keys added and {totals['keys_updated']} updated, "
+              f"{totals['files_created']} files created and {totals['files_changed']} changed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export or import the translations of every project of a manifest.')
+    parser.add_argument('-action', type=str, choices=['export', 'import'], required=True,
+                        help='export the resources to the spreadsheets, or import the spreadsheets to the resources')
+    parser.add_argument('-manifest', type=str, help='JSON manifest of the projects', default=manifestPath)
+    parser.add_argument('-jobs', type=int, help='Number of projects processed at the same time', default=4)
+    parser.add_argument('-cacheDir', type=str, help='Folder for the caches, one subfolder per project',
+                        default=cacheDir)
+    parser.add_argument('-noCache', action='store_true', help='Search, parse and download everything again')
+    parser.add_argument('-sync', type=str, choices=['new', 'diff'], default='new',
+                        help='Google Sheets exports: new uploads missing keys only, diff also updates changed cells')
+    parser.add_argument('-requestsPerMinute', type=int, help='Google Sheets API quota per minute, for all projects',
+                        default=DEFAULT_REQUESTS_PER_MINUTE)
+    parser.add_argument('-maxRetries', type=int, help='Retries of a throttled request before giving up',
+                        default=DEFAULT_MAX_RETRIES)
+    parser.add_argument('-report', type=str, nargs='?', const='-',
+                        help='Print the aggregated change report as JSON, or write it to this file')
+    parser.add_argument('-timings', type=str, nargs='?', const='-',
+                        help='Print the time of each phase and the counters as JSON, or write them to this file')
+    args = parser.parse_args()
+
+    try:
+        projects = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+
+    timings = Timings('batch-translations')
+    report = run_batch(projects, args.action, args.jobs, None if args.noCache else args.cacheDir, args.sync,
+                       credentials_file, args.requestsPerMinute, args.maxRetries, timings)
+    print_report(report)
+
+    if args.report:
+        data = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.report == '-':
+            print(data)
+        else:
+            write_atomic(args.report, (data + '\n').encode('utf-8'))
+    if args.timings:
+        timings.emit(args.timings)
+    if report['totals']['failed']:
+        sys.exit(1)
@@ -0,0 +1,486 @@
+"""Local stand-in for Google Sheets, for benchmarking the network paths without credentials.
+
+Serves the CSV export used by the importers, ranges included, and the part
+of the Sheets API v4 the exporter reaches through gspread: spreadsheet
+metadata, values get, values batchUpdate and the addSheet /
+updateSheetProperties requests of batchUpdate, plus the Drive files.get call
+for the modified time. Latency, throttling and the size of the generated
+worksheets can be set, and every request is counted.
+
+Run it on its own:
+
+python3 benchmarks/fake_sheets_server.py -port 8089 -latency 0.05 -requestsPerMinute 60
+
+or start FakeSheetsServer in-process and use LocalSession, which sends the
+requests for Google hosts to the local server instead.
+"""
+import argparse
+import collections
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+
+GOOGLE_HOSTS = ('https://sheets.googleapis.com', 'https://www.googleapis.com', 'https://docs.google.com')
+
+_CELL = re.compile(r'^([A-Za-z]*)(\d*)$')
+
+
+def column_number(letters):
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + ord(letter) - ord('A') + 1
+    return number
+
+
+def split_range(range_name):
+    # "'Android'!A1:C3" -> ('Android', 'A1:C3'), "Android" -> ('Android', '')
+    sheet, _, cells = range_name.rpartition('!') if '!' in range_name else (range_name, '', '')
+    if sheet.startswith("'") and sheet.endswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, cells
+
+
+def parse_cells(cells, rows, cols):
+    """Return (first_row, first_col, last_row, last_col), 1-based and inclusive, of an A1 range.
+
+    Open ends ("A1:A", "A1:1" or no range at all) stop at the last row or column with data.
+    """
+    if not cells:
+        return 1, 1, rows, cols
+    start, _, end = cells.partition(':')
+    start_col, start_row = _CELL.match(start).groups()
+    first_row, first_col = int(start_row or 1), column_number(start_col) if start_col else 1
+    if not end:
+        return first_row, first_col, first_row if start_row else rows, first_col if start_col else cols
+    end_col, end_row = _CELL.match(end).groups()
+    return first_row, first_col, int(end_row) if end_row else rows, column_number(end_col) if end_col else cols
+
+
+class Worksheet:
+    def __init__(self, sheet_id, title, index, row_count=1000, col_count=26):
+        self.sheet_id = sheet_id
+        self.title = title
+        self.index = index
+        self.row_count = row_count
+        self.col_count = col_count
+        self.cells = {}
+
+    def used_size(self):
+        if not self.cells:
+            return 0, 0
+        return max(row for row, _ in self.cells), max(col for _, col in self.cells)
+
+    def values(self, first_row, first_col, last_row, last_col):
+        # Trailing empty cells and rows are left out, like the real API does
+        values = []
+        for row in range(first_row, last_row + 1):
+            cells = [self.cells.get((row, col), '') for col in range(first_col, last_col + 1)]
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def set_rows(self, first_row, first_col, rows):
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                if value == '':
+                    self.cells.pop((first_row + i, first_col + j), None)
+                else:
+                    self.cells[(first_row + i, first_col + j)] = str(value)
+
+    def properties(self):
+        return {
+            'sheetId': self.sheet_id,
+            'title': self.title,
+            'index': self.index,
+            'sheetType': 'GRID',
+            'gridProperties': {'rowCount': self.row_count, 'columnCount': self.col_count},
+        }
+
+    def to_csv(self, cells=''):
+        rows, cols = self.used_size()
+        first_row, first_col, last_row, last_col = parse_cells(cells, rows, cols)
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator='\r\n')
+        for row in range(first_row, min(last_row, rows) + 1):
+            writer.writerow([self.cells.get((row, col), '') for col in range(first_col, last_col + 1)])
+        return output.getvalue().encode('utf-8')
+
+
+class Spreadsheet:
+    def __init__(self, spreadsheet_id, title='Translations'):
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+        self.worksheets = []
+        # Bumped on every write, like the revision of a Drive file
+        self.revision = 1
+        self.modified_time = time.time()
+
+    def add_worksheet(self, title, row_count=1000, col_count=26, sheet_id=None):
+        if sheet_id is None:
+            sheet_id = max((worksheet.sheet_id for worksheet in self.worksheets), default=0) + 1
+        worksheet = Worksheet(sheet_id, title, len(self.worksheets), row_count, col_count)
+        self.worksheets.append(worksheet)
+        return worksheet
+
+    def worksheet(self, title=None, sheet_id=None):
+        for worksheet in self.worksheets:
+            if worksheet.title == title or worksheet.sheet_id == sheet_id:
+                return worksheet
+        return None
+
+    def changed(self):
+        self.revision += 1
+        # Drive reports milliseconds, keep two writes in the same millisecond apart
+        self.modified_time = max(time.time(), self.modified_time + 0.001)
+
+    def drive_metadata(self):
+        seconds = int(self.modified_time)
+        milliseconds = int((self.modified_time - seconds) * 1000)
+        return {
+            'id': self.spreadsheet_id,
+            'name': self.title,
+            'createdTime': '2024-01-01T00:00:00.000Z',
+            'modifiedTime': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{milliseconds:03d}Z',
+        }
+
+    def metadata(self):
+        return {
+            'spreadsheetId': self.spreadsheet_id,
+            'properties': {'title': self.title, 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+            'sheets': [{'properties': worksheet.properties()} for worksheet in self.worksheets],
+            'spreadsheetUrl': f'https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}',
+        }
+
+
+def fill_worksheet(worksheet, keys, languages, value_bytes=40, untranslated=0.05, seed=0):
+    """Fill worksheet with a header row and keys rows of generated translations, value_bytes long on average."""
+    rng = random.Random(seed)
+    words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do']
+    worksheet.set_rows(1, 2, [languages])
+    rows = []
+    for i in range(keys):
+        row = [f'key_{i}']
+        for language in languages:
+            if rng.random() < untranslated:
+                row.append('UNTRANSLATED')
+                continue
+            value = []
+            while sum(len(word) + 1 for word in value) < value_bytes:
+                value.append(rng.choice(words))
+            row.append(' '.join(value))
+        rows.append(row)
+    worksheet.set_rows(2, 1, rows)
+    worksheet.row_count = max(worksheet.row_count, keys + 1)
+    worksheet.col_count = max(worksheet.col_count, len(languages) + 1)
+
+
+class FakeSheetsServer:
+    """A threaded HTTP server holding spreadsheets in memory.
+
+    latency: seconds added to every response.
+    requests_per_minute: answer 429 RATE_LIMIT_EXCEEDED past this many API
+        requests in any 60 seconds, None for no quota. The CSV export does
+        not count, as with Google.
+    error_rate: share of API requests answered with a 429 anyway, drawn from
+        a random generator seeded with seed so runs are reproducible.
+    max_request_bytes: larger request bodies are rejected with a 413.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, requests_per_minute=None, error_rate=0.0,
+                 max_request_bytes=None, seed=0):
+        self.latency = latency
+        self.requests_per_minute = requests_per_minute
+        self.error_rate = error_rate
+        self.max_request_bytes = max_request_bytes
+        self.random = random.Random(seed)
+        self.spreadsheets = {}
+        self.counts = collections.Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.recent = collections.deque()
+        # Handlers take it around the spreadsheet state and again for the counters
+        self.lock = threading.RLock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def add_spreadsheet(self, spreadsheet_id, title='Translations'):
+        spreadsheet = Spreadsheet(spreadsheet_id, title)
+        self.spreadsheets[spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': dict(self.counts),
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.counts.clear()
+            self.bytes_in = 0
+            self.bytes_out = 0
+
+    def _throttled(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.error_rate and self.random.random() < self.error_rate:
+                return True
+            if self.requests_per_minute is None:
+                return False
+            while self.recent and now - self.recent[0] >= 60:
+                self.recent.popleft()
+            if len(self.recent) >= self.requests_per_minute:
+                return True
+            self.recent.append(now)
+            return False
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body=b'', content_type='application/json', headers=None):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with server.lock:
+                    server.bytes_out += len(body)
+
+            def error(self, status, message, reason):
+                self.send(status, {'error': {'code': status, 'message': message, 'status': reason}})
+
+            def handle_request(self, method):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with server.lock:
+                    server.bytes_in += len(body)
+
+                parts = urlsplit(self.path)
+                path = unquote(parts.path)
+                query = parse_qs(parts.query)
+
+                export = re.match(r'^/spreadsheets/d/([^/]+)/export$', path)
+                if export and method == 'GET':
+                    return self.csv_export(export.group(1), query)
+
+                drive = re.match(r'^/drive/v3/files/([^/]+)$', path)
+                if drive and method == 'GET':
+                    return self.drive_file(drive.group(1))
+
+                api = re.match(r'^/v4/spreadsheets/([^/:]+)(.*)$', path)
+                if not api:
+                    return self.error(404, f'Unknown path {path}', 'NOT_FOUND')
+
+                name = f"{method} {re.sub(r'/values/.*', '/values/<range>', api.group(2)) or '/'}"
+                with server.lock:
+                    server.counts[name] += 1
+
+                if server.max_request_bytes is not None and len(body) > server.max_request_bytes:
+                    return self.error(413, 'Request payload size exceeds the limit', 'INVALID_ARGUMENT')
+                if server._throttled():
+                    with server.lock:
+                        server.counts['429'] += 1
+                    return self.error(429, "Quota exceeded for quota metric 'Write requests' (RATE_LIMIT_EXCEEDED)",
+                                      'RESOURCE_EXHAUSTED')
+
+                spreadsheet = server.spreadsheets.get(api.group(1))
+                if spreadsheet is None:
+                    return self.error(404, 'Requested entity was not found.', 'NOT_FOUND')
+
+                with server.lock:
+                    self.api(method, spreadsheet, api.group(2), json.loads(body) if body else {})
+
+            def csv_export(self, spreadsheet_id, query):
+                with server.lock:
+                    server.counts['GET export'] += 1
+                    spreadsheet = server.spreadsheets.get(spreadsheet_id)
+                    worksheet = spreadsheet and spreadsheet.worksheet(sheet_id=int(query.get('gid', ['0'])[0]))
+                    if worksheet is None:
+                        return self.send(404, b'Not found', 'text/plain')
+                    content = worksheet.to_csv(query.get('range', [''])[0])
+
+                etag = '"' + hashlib.sha1(content).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    with server.lock:
+                        server.counts['304'] += 1
+                    return self.send(304, headers={'ETag': etag})
+                self.send(200, content, 'text/csv', {'ETag': etag})
+
+            def drive_file(self, spreadsheet_id):
+                with server.lock:
+                    server.counts['GET drive'] += 1
+                    spreadsheet = server.spreadsheets.get(spreadsheet_id)
+                    if spreadsheet is None:
+                        return self.error(404, f'File not found: {spreadsheet_id}.', 'NOT_FOUND')
+                    self.send(200, spreadsheet.drive_metadata())
+
+            def api(self, method, spreadsheet, action, payload):
+                if method == 'GET' and action == '':
+                    return self.send(200, spreadsheet.metadata())
+
+                if method == 'GET' and action.startswith('/values/'):
+                    range_name = action[len('/values/'):]
+                    sheet, cells = split_range(range_name)
+                    worksheet = spreadsheet.worksheet(title=sheet)
+                    if worksheet is None:
+                        return self.error(400, f'Unable to parse range: {range_name}', 'INVALID_ARGUMENT')
+                    query = parse_qs(urlsplit(self.path).query)
+                    values = worksheet.values(*parse_cells(cells, *worksheet.used_size()))
+                    major_dimension = query.get('majorDimension', ['ROWS'])[0]
+                    if major_dimension == 'COLUMNS':
+                        width = max((len(row) for row in values), default=0)
+                        values = [[row[i] if i < len(row) else '' for row in values] for i in range(width)]
+                        values = [column[:max((j + 1 for j, v in enumerate(column) if v != ''), default=0)]
+                                  for column in values]
+                    response = {'range': range_name, 'majorDimension': major_dimension}
+                    if values:
+                        response['values'] = values
+                    return self.send(200, response)
+
+                if method == 'POST' and action == '/values:batchUpdate':
+                    updated_cells = 0
+                    for data in payload.get('data', []):
+                        sheet, cells = split_range(data['range'])
+                        worksheet = spreadsheet.worksheet(title=sheet)
+                        if worksheet is None:
+                            return self.error(400, f'Unable to parse range: {data["range"]}', 'INVALID_ARGUMENT')
+                        first_row, first_col, _, _ = parse_cells(cells, *worksheet.used_size())
+                        if first_row + len(data['values']) - 1 > worksheet.row_count or \
+                                first_col + max(map(len, data['values'])) - 1 > worksheet.col_count:
+                            return self.error(400, f'Range ({data["range"]}) exceeds grid limits', 'INVALID_ARGUMENT')
+                        worksheet.set_rows(first_row, first_col, data['values'])
+                        updated_cells += sum(map(len, data['values']))
+                    spreadsheet.changed()
+                    return self.send(200, {'spreadsheetId': spreadsheet.spreadsheet_id,
+                                           'totalUpdatedCells': updated_cells})
+
+                if method == 'POST' and action == ':batchUpdate':
+                    replies = []
+                    for request in payload.get('requests', []):
+                        if 'addSheet' in request:
+                            properties = request['addSheet'].get('properties', {})
+                            grid = properties.get('gridProperties', {})
+                            worksheet = spreadsheet.add_worksheet(properties.get('title', 'Sheet'),
+                                                                  grid.get('rowCount', 1000),
+                                                                  grid.get('columnCount', 26),
+                                                                  properties.get('sheetId'))
+                            replies.append({'addSheet': {'properties': worksheet.properties()}})
+                        elif 'updateSheetProperties' in request:
+                            properties = request['updateSheetProperties']['properties']
+                            worksheet = spreadsheet.worksheet(sheet_id=properties['sheetId'])
+                            grid = properties.get('gridProperties', {})
+                            worksheet.row_count = grid.get('rowCount', worksheet.row_count)
+                            worksheet.col_count = grid.get('columnCount', worksheet.col_count)
+                            replies.append({})
+                        else:
+                            return self.error(400, f'Unsupported request {list(request)}', 'INVALID_ARGUMENT')
+                    spreadsheet.changed()
+                    return self.send(200, {'spreadsheetId': spreadsheet.spreadsheet_id, 'replies': replies})
+
+                self.error(404, f'Unsupported {method} {action}', 'NOT_FOUND')
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+            def do_PUT(self):
+                self.handle_request('PUT')
+
+        return Handler
+
+
+class LocalSession(requests.Session):
+    """A requests.Session that sends requests for Google hosts to base_url.
+
+    Pass it to gspread.authorize(None, session=...) or CsvExport(session=...).
+    """
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, url, *args, **kwargs):
+        for host in GOOGLE_HOSTS:
+            if url.startswith(host):
+                url = self.base_url + url[len(host):]
+                break
+        return super().request(method, url, *args, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve a fake Google Sheet for benchmarks.')
+    parser.add_argument('-port', type=int, help='Port to listen on', default=8089)
+    parser.add_argument('-spreadsheetId', type=str, help='Id of the served spreadsheet', default='benchmark')
+    parser.add_argument('-keys', type=int, help='Keys generated in each worksheet', default=5000)
+    parser.add_argument('-valueBytes', type=int, help='Average length of the generated values', default=40)
+    parser.add_argument('-latency', type=float, help='Seconds added to every response', default=0.0)
+    parser.add_argument('-requestsPerMinute', type=int, help='API quota, unlimited by default', default=None)
+    parser.add_argument('-errorRate', type=float, help='Share of API requests answered with a 429', default=0.0)
+    parser.add_argument('-maxRequestBytes', type=int, help='Largest accepted request body', default=None)
+    args = parser.parse_args()
+
+    server = FakeSheetsServer(port=args.port, latency=args.latency, requests_per_minute=args.requestsPerMinute,
+                              error_rate=args.errorRate, max_request_bytes=args.maxRequestBytes)
+    spreadsheet = server.add_spreadsheet(args.spreadsheetId)
+    for title in ('Android', 'iOS'):
+        fill_worksheet(spreadsheet.add_worksheet(title), args.keys, ['SPANISH', 'ENGLISH', 'FRENCH'],
+                       args.valueBytes, seed=len(spreadsheet.worksheets))
+
+    print(f"Serving spreadsheet {args.spreadsheetId} on {server.url}")
+    for worksheet in spreadsheet.worksheets:
+        print(f"  {worksheet.title}: gid {worksheet.sheet_id}, "
+              f"{server.url}/spreadsheets/d/{args.spreadsheetId}/export?format=csv&gid={worksheet.sheet_id}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,112 @@
+"""Network paths of the google-sheets scripts against the local fake Google Sheets server.
+
+Exports generated Android and iOS resources to an empty spreadsheet, exports
+again twice with nothing new (the second time the key index cache is valid),
+exports changed values with -sync diff and then imports both tabs cold,
+unchanged (304) and offline. Each phase reports its time and the requests
+the server saw.
+
+python3 benchmarks/sheets_network.py -keys 5000 -latency 0.05 -requestsPerMinute 300
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import gspread
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.api import export_google_sheets, import_google_sheets
+from app_translations.sheets import RequestScheduler, is_retryable_api_error
+from fake_sheets_server import FakeSheetsServer, LocalSession
+
+SPREADSHEET_ID = 'benchmark'
+
+# The language mappers of google-sheets-export.py and google-sheets-import.py
+EXPORT_ANDROID_MAPPER = {'values': 'SPANISH', 'values-en': 'ENGLISH', 'values-fr': 'FRENCH'}
+EXPORT_IOS_MAPPER = {'es.lproj': 'SPANISH', 'en.lproj': 'ENGLISH', 'fr.lproj': 'FRANCÉS'}
+IMPORT_ANDROID_MAPPER = {'ENGLISH': 'values-en', 'SPANISH': 'values', 'FRENCH': 'values-fr'}
+IMPORT_IOS_MAPPER = {'ENGLISH': 'en.lproj', 'SPANISH': 'es.lproj', 'FRENCH': 'fr.lproj'}
+
+
+def write_resources(root, keys, changed=0):
+    # Android values folders and iOS lproj folders, the names the scripts' mappers expect
+    for folder in ('values', 'values-en', 'values-fr'):
+        os.makedirs(os.path.join(root, 'android', folder), exist_ok=True)
+        with open(os.path.join(root, 'android', folder, 'strings.xml'), 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<resources>\n')
+            for i in range(keys):
+                value = f'{folder} text {i}' + (' changed' if i < changed else '')
+                f.write(f'    <string name="key_{i}">{value}</string>\n')
+            f.write('</resources>\n')
+
+    for folder in ('es.lproj', 'en.lproj', 'fr.lproj'):
+        os.makedirs(os.path.join(root, 'ios', folder), exist_ok=True)
+        with open(os.path.join(root, 'ios', folder, 'Localizable.strings'), 'w', encoding='utf-8') as f:
+            for i in range(keys):
+                value = f'{folder} text {i}' + (' changed' if i < changed else '')
+                f.write(f'"key_{i}" = "{value}";\n')
+
+
+def run_phase(name, server, func, *args):
+    server.reset_stats()
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        func(*args)
+    elapsed = time.perf_counter() - start
+
+    stats = server.stats()
+    requests = ', '.join(f'{count} {request}' for request, count in sorted(stats['requests'].items()))
+    print(f"{name:>16}: {elapsed:7.3f}s  {stats['bytes_in'] / 1024:8.1f} KB up  "
+          f"{stats['bytes_out'] / 1024:8.1f} KB down  {requests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the google-sheets scripts against a local fake server.')
+    parser.add_argument('-keys', type=int, help='Keys per platform', default=5000)
+    parser.add_argument('-changed', type=int, help='Keys whose values change before the diff export', default=100)
+    parser.add_argument('-latency', type=float, help='Seconds added to every response', default=0.05)
+    parser.add_argument('-requestsPerMinute', type=int, help='Quota of the server and the exporter', default=300)
+    parser.add_argument('-errorRate', type=float, help='Share of API requests answered with a 429', default=0.0)
+    args = parser.parse_args()
+
+    with FakeSheetsServer(latency=args.latency, requests_per_minute=args.requestsPerMinute,
+                          error_rate=args.errorRate) as server, tempfile.TemporaryDirectory() as tmp_dir:
+        spreadsheet = server.add_spreadsheet(SPREADSHEET_ID)
+        android_tab = spreadsheet.add_worksheet('Android')
+        ios_tab = spreadsheet.add_worksheet('iOS')
+        write_resources(tmp_dir, args.keys)
+
+        # A client talking to the fake server instead of one authorized with a service account
+        client = gspread.Client(None, session=LocalSession(server.url))
+        scheduler = RequestScheduler(args.requestsPerMinute, is_retryable=is_retryable_api_error)
+
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        android_sources = os.path.join(tmp_dir, 'android')
+        ios_sources = os.path.join(tmp_dir, 'ios')
+        output_dir = os.path.join(tmp_dir, 'import')
+
+        def export_run(sync_mode):
+            export_google_sheets(android_sources, ios_sources, SPREADSHEET_ID, EXPORT_ANDROID_MAPPER,
+                                 EXPORT_IOS_MAPPER, [], cache_dir, sync_mode, client=client, scheduler=scheduler)
+
+        def import_run(offline=False):
+            tabs = [('android', str(android_tab.sheet_id)), ('ios', str(ios_tab.sheet_id))]
+            import_google_sheets(SPREADSHEET_ID, tabs, IMPORT_ANDROID_MAPPER, IMPORT_IOS_MAPPER, output_dir,
+                                 output_dir, 8, cache_dir, 0, offline, session=LocalSession(server.url))
+
+        print(f"{args.keys} keys per platform, {args.latency * 1000:.0f} ms latency, "
+              f"{args.requestsPerMinute} requests per minute")
+        run_phase('export new', server, export_run, 'new')
+        run_phase('export no-op', server, export_run, 'new')
+        run_phase('export unchanged', server, export_run, 'new')
+        write_resources(tmp_dir, args.keys, args.changed)
+        run_phase('export diff', server, export_run, 'diff')
+
+        run_phase('import cold', server, import_run)
+        run_phase('import 304', server, import_run)
+        run_phase('import offline', server, import_run, True)
@@ -0,0 +1,123 @@
+"""Throughput of the .strings tokenizer against the previous split-based line parser.
+
+Each case is a generated file of -sizeMb: plain entries, escape sequences,
+multi-line values and UTF-16. The split parser only handles the first one.
+
+python3 benchmarks/strings_tokenizer.py -sizeMb 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.ios import decode_strings, iter_strings_entries, read_strings_file
+
+
+# Generated files: plain one-line entries, values with escape sequences ('=' and ';' included), values over several
+# lines, and the plain file saved by Xcode as UTF-16 with a byte order mark
+CASES = {
+    'plain': 'utf-8',
+    'escapes': 'utf-8',
+    'multiline': 'utf-8',
+    'utf16': 'utf-16',
+}
+
+
+def generate_value(case, words):
+    value = ' '.join(random.choice(words) for _ in range(random.randint(2, 12)))
+    if case == 'escapes' and random.random() < 0.5:
+        value = random.choice(['Tap \\"{}\\"', '{}\\n2 = 1 + 1;', 'C:\\\\{}', '{} \\U20AC']).format(value)
+    elif case == 'multiline' and random.random() < 0.3:
+        value = value.replace(' ', '\n', 2)
+    return value
+
+
+def generate_strings_file(file_path, size_mb, case='plain', seed=0):
+    random.seed(seed)
+    words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do']
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(file_path, 'w', encoding=CASES[case]) as f:
+        i = 0
+        while written < target:
+            if i % 50 == 0:
+                line = f"/* Section {i // 50} */\n"
+            else:
+                line = f"\"screen_{i // 50}.label_{i}\" = \"{generate_value(case, words)}\";\n"
+            f.write(line)
+            written += len(line)
+            i += 1
+
+
+def parse_split(file_path):
+    # The parser the exporters used before the tokenizer
+    translations = {}
+    with open(file_path, encoding='utf-8') as f:
+        for item in f.readlines():
+            parts = item.split("=")
+            if len(parts) == 2:
+                key = parts[0].strip()[1:-1]
+                value = parts[1].strip()[1:-2].strip() if parts[1].strip() else "UNTRANSLATED"
+                translations[key] = value
+    return translations
+
+
+def parse_tokenizer(file_path):
+    # What the exporters run
+    translations = {}
+    for key, value in read_strings_file(file_path):
+        translations[key] = value.strip()
+    return translations
+
+
+def parse_tokenizer_spans(file_path):
+    # What the importers' StringsDocument runs
+    with open(file_path, 'rb') as f:
+        text, _ = decode_strings(f.read())
+    translations = {}
+    for key, value, _ in iter_strings_entries(text):
+        translations[key] = value.strip()
+    return translations
+
+
+def measure(parse, file_path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(file_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the Localizable.strings tokenizer.')
+    parser.add_argument('-sizeMb', type=int, help='Size of each generated file in MB', default=20)
+    parser.add_argument('-repeat', type=int, help='Runs per parser, the best one is reported', default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for case in CASES:
+            file_path = os.path.join(tmp_dir, f'{case}.strings')
+            generate_strings_file(file_path, args.sizeMb, case)
+            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+
+            print(f"{case}: {size_mb:.1f} MB")
+            results = {}
+            for name, parse in (('split', parse_split), ('tokenizer', parse_tokenizer),
+                                ('spans', parse_tokenizer_spans)):
+                try:
+                    elapsed, results[name] = measure(parse, file_path, args.repeat)
+                except UnicodeDecodeError:
+                    print(f"{name:>10}: cannot decode the file")
+                    continue
+                print(f"{name:>10}: {elapsed:.3f}s  {size_mb / elapsed:.1f} MB/s  {len(results[name])} keys")
+
+            if results['tokenizer'] != results['spans']:
+                print("Warning: the tokenizer and its spans disagree on this file")
+            if 'split' in results and results['split'] != results['tokenizer']:
+                wrong = sum(1 for key, value in results['tokenizer'].items() if results['split'].get(key) != value)
+                print(f"{'':>10}  split gets {wrong} of the keys wrong")
@@ -0,0 +1,121 @@
+"""Generated Android and iOS projects with matching workbooks and CSV exports, for the benchmarks.
+
+A project has one strings.xml per Android values folder, one
+Localizable.strings per iOS lproj folder and the spreadsheet the exporters
+would produce from them, as an xlsx workbook and as one CSV per worksheet.
+change_ratio of the keys get another value in the spreadsheet and a tenth
+as many new keys are appended to it, so importing it back has work to do.
+
+python3 benchmarks/synthetic_project.py /tmp/project -keys 20000 -locales 5 -changeRatio 0.1
+"""
+import argparse
+import csv
+import os
+import random
+
+import xlsxwriter
+
+LANGUAGE_CODES = ['es', 'en', 'fr', 'de', 'it', 'pt', 'nl', 'sv', 'pl', 'ja', 'ko', 'zh']
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod']
+
+
+def project_locales(count):
+    # (android folder, ios folder, spreadsheet column) per locale, the first one is the default values folder
+    locales = []
+    for i in range(count):
+        code = LANGUAGE_CODES[i] if i < len(LANGUAGE_CODES) else f'x{i}'
+        locales.append(('values' if i == 0 else f'values-{code}', f'{code}.lproj', code.upper()))
+    return locales
+
+
+def android_mapper(locales):
+    # Folder -> column, the shape of the exporter's android_language_mapper
+    return {android: column for android, _, column in locales}
+
+
+def ios_mapper(locales):
+    return {ios: column for _, ios, column in locales}
+
+
+def generate_values(keys, locales, seed=0):
+    # {column: [value per key]}, the same texts on both platforms
+    rng = random.Random(seed)
+    return {column: [f"{' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 10)))} {i}" for i in range(keys)]
+            for _, _, column in locales}
+
+
+def write_android_tree(root, keys, locales, values):
+    for android, _, column in locales:
+        os.makedirs(os.path.join(root, android), exist_ok=True)
+        with open(os.path.join(root, android, 'strings.xml'), 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<resources>\n')
+            for i in range(keys):
+                if i % 50 == 0:
+                    f.write(f'    <!-- Screen {i // 50} -->\n')
+                f.write(f'    <string name="screen_{i // 50}_label_{i}">{values[column][i]}</string>\n')
+            f.write('</resources>\n')
+
+
+def write_ios_tree(root, keys, locales, values):
+    for _, ios, column in locales:
+        os.makedirs(os.path.join(root, ios), exist_ok=True)
+        with open(os.path.join(root, ios, 'Localizable.strings'), 'w', encoding='utf-8') as f:
+            for i in range(keys):
+                if i % 50 == 0:
+                    f.write(f'/* Screen {i // 50} */\n')
+                f.write(f'"screen_{i // 50}_label_{i}" = "{values[column][i]}";\n')
+
+
+def sheet_rows(keys, locales, values, change_ratio, seed=0):
+    # Header row as the exporters write it (A1 empty), then one row per key with the changes applied
+    rng = random.Random(seed + 1)
+    changed = set(rng.sample(range(keys), round(keys * change_ratio)))
+    columns = [column for _, _, column in locales]
+    rows = [[''] + columns]
+    for i in range(keys):
+        suffix = ' (updated)' if i in changed else ''
+        rows.append([f'screen_{i // 50}_label_{i}'] + [values[column][i] + suffix for column in columns])
+    for i in range(len(changed) // 10):
+        rows.append([f'new_label_{i}'] + [f'{column.lower()} new text {i}' for column in columns])
+    return rows
+
+
+def write_workbook(excel_file, sheets):
+    # {sheet name: rows}
+    workbook = xlsxwriter.Workbook(excel_file, {'constant_memory': True})
+    for name, rows in sheets.items():
+        worksheet = workbook.add_worksheet(name)
+        for row, values in enumerate(rows):
+            worksheet.write_row(row, 0, values)
+    workbook.close()
+
+
+def write_csv(csv_file, rows):
+    with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+def generate_project(root, keys, locale_count, change_ratio, seed=0):
+    """Write android/, ios/, translations.xlsx, android.csv and ios.csv below root and return the locales."""
+    locales = project_locales(locale_count)
+    values = generate_values(keys, locales, seed)
+    write_android_tree(os.path.join(root, 'android'), keys, locales, values)
+    write_ios_tree(os.path.join(root, 'ios'), keys, locales, values)
+
+    rows = sheet_rows(keys, locales, values, change_ratio, seed)
+    write_workbook(os.path.join(root, 'translations.xlsx'), {'Android': rows, 'iOS': rows})
+    write_csv(os.path.join(root, 'android.csv'), rows)
+    write_csv(os.path.join(root, 'ios.csv'), rows)
+    return locales
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate an Android and iOS project with a matching spreadsheet.')
+    parser.add_argument('root', type=str, help='Folder to write the project to')
+    parser.add_argument('-keys', type=int, help='Keys per platform', default=20000)
+    parser.add_argument('-locales', type=int, help='Number of locales', default=3)
+    parser.add_argument('-changeRatio', type=float, help='Share of keys changed in the spreadsheet', default=0.1)
+    parser.add_argument('-seed', type=int, help='Seed of the generated texts', default=0)
+    args = parser.parse_args()
+
+    generate_project(args.root, args.keys, args.locales, args.changeRatio, args.seed)
@@ -0,0 +1,233 @@
+"""Every phase of the local export and import on a generated project, compared with stored baselines.
+
+Generates an Android and iOS project with synthetic_project.py, then times
+the phases the local-excel scripts go through: discover the resource files,
+parse them, merge them in the translation tables, write the workbook, load
+the changed workbook (and its CSV export, as the google-sheets importers do)
+and write the changes back to the resource files. Each phase reports its
+best time over -repeat runs, its throughput and the peak resident memory of
+the process while it ran.
+
+Results are compared with benchmarks/baselines/translation_pipeline.json for
+the same configuration, phases slower (or using more memory) than the
+baseline by more than -tolerance are reported as regressions and the script
+exits with status 1. -updateBaseline stores the current results instead.
+
+python3 benchmarks/translation_pipeline.py -keys 20000 -locales 3 -changeRatio 0.1
+python3 benchmarks/translation_pipeline.py -keys 20000 -locales 3 -changeRatio 0.1 -updateBaseline
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.api import write_android_language, write_ios_language
+from app_translations.csvexport import read_csv_translations
+from app_translations.discovery import discover_resource_files
+from app_translations.files import write_atomic
+from app_translations.parsing import map_resource_languages, merge_translations, parse_resource_files, \
+    process_android_file, process_ios_file
+from app_translations.table import TranslationTable
+from app_translations.workbook import load_workbook_translations, write_translations_workbook
+from synthetic_project import android_mapper, generate_project, ios_mapper
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'translation_pipeline.json')
+MB = 1024 * 1024
+
+# Differences below these are noise whatever the ratio
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 8
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # No procfs (macOS): the peak of the whole process so far, in bytes on macOS and KB elsewhere
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class PeakRss:
+    """Highest resident set size of the process while the block runs, sampled from a background thread."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+class Pipeline:
+    """One export and import of a generated project, phase by phase, with the functions the scripts call."""
+
+    def __init__(self, root, locales, jobs):
+        self.root = root
+        self.jobs = jobs
+        self.android_language_mapper = android_mapper(locales)
+        self.ios_language_mapper = ios_mapper(locales)
+        self.android_columns = {column: folder for folder, column in self.android_language_mapper.items()}
+        self.ios_columns = {column: folder for folder, column in self.ios_language_mapper.items()}
+        self.texts_android = TranslationTable()
+        self.texts_ios = TranslationTable()
+        self.paths = self.parsed = self.sheets = None
+
+    def discover(self):
+        self.paths = discover_resource_files(os.path.join(self.root, 'android'), os.path.join(self.root, 'ios'))
+
+    def parse(self):
+        android_files = map_resource_languages(self.paths[0], self.android_language_mapper)
+        ios_files = map_resource_languages(self.paths[1], self.ios_language_mapper)
+        self.parsed = (parse_resource_files(process_android_file, android_files, self.jobs),
+                       parse_resource_files(process_ios_file, ios_files, self.jobs))
+
+    def merge(self):
+        merge_translations(self.texts_android, self.parsed[0])
+        merge_translations(self.texts_ios, self.parsed[1])
+
+    def write_workbook(self):
+        write_translations_workbook(os.path.join(self.root, 'export.xlsx'), {
+            'Android': (self.texts_android, list(self.android_language_mapper.values())),
+            'iOS': (self.texts_ios, list(self.ios_language_mapper.values())),
+        })
+
+    def load_workbook(self):
+        self.sheets = load_workbook_translations(os.path.join(self.root, 'translations.xlsx'),
+                                                 {'Android': self.android_columns, 'iOS': self.ios_columns})
+
+    def load_csv(self):
+        for name, mapper in (('android', self.android_columns), ('ios', self.ios_columns)):
+            with open(os.path.join(self.root, name + '.csv'), encoding='utf-8', newline='') as f:
+                read_csv_translations(csv.reader(f), mapper)
+
+    def write_resources(self):
+        for android_lang in self.android_columns.values():
+            write_android_language(self.sheets['Android'], android_lang, os.path.join(self.root, 'android'))
+        for ios_lang in self.ios_columns.values():
+            write_ios_language(self.sheets['iOS'], ios_lang, os.path.join(self.root, 'ios'))
+
+
+PHASES = ['discover', 'parse', 'merge', 'write_workbook', 'load_workbook', 'load_csv', 'write_resources']
+
+
+def run_pipeline(keys, locale_count, change_ratio, jobs):
+    # {phase: (seconds, peak rss)} of one run on a freshly generated project
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        locales = generate_project(root, keys, locale_count, change_ratio)
+        pipeline = Pipeline(root, locales, jobs)
+        for phase in PHASES:
+            with PeakRss() as rss, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                getattr(pipeline, phase)()
+                elapsed = time.perf_counter() - start
+            results[phase] = (elapsed, rss.peak)
+        table_bytes = pipeline.texts_android.memory_usage() + pipeline.texts_ios.memory_usage()
+    return results, table_bytes
+
+
+def config_key(args):
+    return f"keys={args.keys} locales={args.locales} changeRatio={args.changeRatio} jobs={args.jobs}"
+
+
+def load_baselines(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(phase, result, baseline, tolerance):
+    # Text for the baseline column and whether the phase regressed
+    if not baseline or phase not in baseline:
+        return '', False
+    base = baseline[phase]
+    ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+    slower = (result['seconds'] > base['seconds'] * (1 + tolerance)
+              and result['seconds'] - base['seconds'] > MIN_SECONDS_DELTA)
+    bigger = (result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance)
+              and result['peak_rss_mb'] - base['peak_rss_mb'] > MIN_RSS_DELTA_MB)
+    flags = ' '.join(flag for flag, hit in (('SLOWER', slower), ('MORE MEMORY', bigger)) if hit)
+    return f"{ratio:6.2f}x {flags}", slower or bigger
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark every phase of the local export and import.')
+    parser.add_argument('-keys', type=int, help='Keys per platform', default=20000)
+    parser.add_argument('-locales', type=int, help='Number of locales', default=3)
+    parser.add_argument('-changeRatio', type=float, help='Share of keys changed in the spreadsheet', default=0.1)
+    parser.add_argument('-jobs', type=int, help='Parser processes, as the exporter -jobs', default=1)
+    parser.add_argument('-repeat', type=int, help='Runs per phase, the best one is reported', default=3)
+    parser.add_argument('-tolerance', type=float, help='Allowed slowdown over the baseline, 0.25 is 25%%',
+                        default=0.25)
+    parser.add_argument('-baselineFile', type=str, help='Stored baselines', default=BASELINE_FILE)
+    parser.add_argument('-updateBaseline', action='store_true', help='Store these results as the baseline')
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.repeat):
+        run, table_bytes = run_pipeline(args.keys, args.locales, args.changeRatio, args.jobs)
+        runs.append(run)
+
+    # Best of the runs, the others mostly measure the machine
+    cells = 2 * args.keys * args.locales
+    files = 2 * args.locales
+    results = {}
+    for phase in PHASES:
+        seconds = min(run[phase][0] for run in runs)
+        results[phase] = {
+            'seconds': round(seconds, 4),
+            'throughput': round((files if phase == 'discover' else cells) / seconds if seconds else 0.0),
+            'peak_rss_mb': round(min(run[phase][1] for run in runs) / MB, 1),
+        }
+
+    baselines = load_baselines(args.baselineFile)
+    key = config_key(args)
+    baseline = baselines.get(key)
+
+    print(f"{key}, best of {args.repeat}, translation tables {table_bytes / MB:.1f} MB")
+    print(f"{'phase':>16} {'seconds':>9} {'throughput':>18} {'peak RSS':>10}  baseline")
+    regressions = []
+    for phase in PHASES:
+        result = results[phase]
+        unit = 'files/s' if phase == 'discover' else 'cells/s'
+        comparison, regressed = compare(phase, result, baseline, args.tolerance)
+        if regressed:
+            regressions.append(phase)
+        print(f"{phase:>16} {result['seconds']:9.4f} {result['throughput']:>10} {unit:<7} "
+              f"{result['peak_rss_mb']:7.1f} MB  {comparison}")
+
+    if args.updateBaseline:
+        baselines[key] = results
+        os.makedirs(os.path.dirname(os.path.abspath(args.baselineFile)), exist_ok=True)
+        write_atomic(args.baselineFile, (json.dumps(baselines, indent=2, sort_keys=True) + '\n').encode('utf-8'))
+        print(f"\nBaseline stored in {args.baselineFile}")
+    elif baseline is None:
+        print(f"\nNo baseline for {key} in {args.baselineFile}, run with -updateBaseline to store one")
+    elif regressions:
+        print(f"\nRegressions over {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
@@ -1,11 +1,16 @@
 import argparse
-import codecs
 import os
-import json
-import requests
+import sys
+
+# Shared helpers live in the app_translations package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.api import import_google_sheets
+from app_translations.report import print_report
+from app_translations.timings import Timings
 
 google_sheet_id = '1QCllfVqvAB08cBltn-iM3gogJYBMyRv2iBy8C3XytFU'
 gid='375629473'
+cache_dir = ".translations-cache"
 
 ios_language_mapper = {
     'ENGLISH': 'en.lproj',
@@ -14,131 +19,41 @@ ios_language_mapper = {
     # Add more mappings as needed
 }
 
-texts_ios = {}
-changes_ios = {}
-
-
-def load_translations(spreadsheet_id, worksheet_id):
-    # Download CSV content from the Google Sheet
-    csv_url = f'https://docs.google.com/spreadsheets/d/{spreadsheet_id}/export?format=csv&gid={worksheet_id}'
-    response = requests.get(csv_url)
-
-    if response.status_code == 200:
-        # Split the content into lines
-        csv_content = response.content.decode('utf-8')
-        lines = csv_content.split('\n')
-
-        # Extract header and data
-        header = list(h.rstrip('\r') for h in lines[0].split(','))
-        data = [line.split(',') for line in lines[1:]]
-
-        # Find the column indices for each language
-        language_indices = {}
-        for column_name, lang in ios_language_mapper.items():
-
-            if column_name in header:
-                language_indices[lang] = header.index(column_name)
-
-        # Iterate over rows to populate texts_ios
-        for row in data:
-            if row:
-                key = row[0]
-                translations = {}
-                # Iterate over languages to get translations
-                for lang, index in language_indices.items():
-                    translation = row[index].strip() if index < len(row) else None
-                    translations[lang] = translation
-                    texts_ios[key] = translations
-
-
-def create_update_xml_file():
-    strings_file = os.path.join(ios_lang, 'Localizable.strings')
-
-    if not os.path.exists(strings_file):
-        # Create a new .strings file and write translations from the Excel sheet
-        with open(strings_file, 'w', encoding='utf-8') as ios_file:
-            for key, value in texts_ios.items():
-                if ios_lang in value and value[ios_lang] != 'UNTRANSLATED':
-                    ios_file.write("\"{}\" = \"{}\";\n".format(key, value[ios_lang]))
-        print(f"\nCreated and populated file: {strings_file}")
-    else:
-        # Update existing .strings file with new translations
-        print(f"\nFile: {strings_file}")
-        with open(strings_file, 'r', encoding='utf-8') as ios_file:
-            content = ios_file.readlines()
-
-        # Initialize changes_ios[ios_lang] if not exists
-        if ios_lang not in changes_ios:
-            changes_ios[ios_lang] = {}
-
-        # Create a set of existing keys in the .strings file
-        existing_keys = {line.split('=')[0].strip()[1:-1] for line in content if '=' in line}
-
-        with open(strings_file, 'a', encoding='utf-8') as ios_file:
-            for key, value in texts_ios.items():
-                # Check if the key already exists in the .strings file
-                if key not in existing_keys:
-                    # If the key does not exist, add a new line with the translation from the Excel sheet
-                    excel_value = value[ios_lang].strip() if value[ios_lang] else None
-                    if excel_value is not None:
-                        if ios_lang in value and excel_value != 'UNTRANSLATED':
-                            ios_file.write("\"{}\" = \"{}\";\n".format(key, excel_value))
-                            changes_ios[ios_lang][key] = excel_value
-                            print(f"Added new key \"{key}\" to {ios_lang} with value {excel_value}")
-            ios_file.close()
-
-        # Continue with updating translations in an existing .strings file
-        with open(strings_file, 'r', encoding='utf-8') as ios_file:
-            content = ios_file.readlines()
-
-        for i in range(len(content)):
-            line = content[i]
-            parts = line.split("=")
-            if len(parts) == 2:
-                key = parts[0].strip()[1:-1]
-
-                if key in texts_ios and ios_lang in texts_ios[key]:
-                    strings_value = parts[1].strip()[1:-2].strip() if parts[1].strip() else None
-                    excel_value = texts_ios[key][ios_lang].strip() if texts_ios[key][ios_lang] else None
-                    if excel_value is not None:
-                        if strings_value is None or (excel_value != strings_value and excel_value != 'UNTRANSLATED'):
-                            print(f"Updating {key} in {ios_lang} to {excel_value}")
-                            content[i] = "\"{}\" = \"{}\";\n".format(key, excel_value)
-
-                            # Record the change
-                            if ios_lang not in changes_ios:
-                                changes_ios[ios_lang] = {}
-                            if key not in changes_ios[ios_lang]:
-                                changes_ios[ios_lang][key] = excel_value
-
-        if len(changes_ios) != 0:
-            output = ''.join(content)
-            with codecs.open(strings_file, 'w', 'utf-8') as ios_file:
-                ios_file.write(output)
-                ios_file.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Import ios translations from Google Sheets.')
     parser.add_argument('-spreadsheetId', type=str, help='Id of the public Google Sheet', default=google_sheet_id)
     parser.add_argument('-gid', type=str, help='Id of the worksheet tab, you can find on the url', default=gid)
+    parser.add_argument('-cacheDir', type=str, help='Folder for the downloaded worksheet', default=cache_dir)
+    parser.add_argument('-noCache', action='store_true', help='Download and import the worksheet even if unchanged')
+    parser.add_argument('-snapshotTtl', type=int, help='Seconds a downloaded worksheet is used without network',
+                        default=0)
+    parser.add_argument('-offline', action='store_true', help='Use the last downloaded worksheet, whatever its age')
+    parser.add_argument('-newRowsOnly', action='store_true', help='Only download rows added since the last import')
+    parser.add_argument('-timings', type=str, nargs='?', const='-',
+                        help='Print the time of each phase and the counters as JSON, or write them to this file')
     args = parser.parse_args()
 
-    # Main script
-    load_translations(args.spreadsheetId, args.gid)
-
-    print("Processing localization files for iOS:")
-
-    for ios_lang in ios_language_mapper.values():
-        if not os.path.exists(ios_lang):
-            os.makedirs(ios_lang)
-
-        create_update_xml_file()
-
-    # Print information about the changes
-    print("\nChanges:")
-    if all(not changes for changes in changes_ios.values()):
-        print("No changes")
-    else:
-        print(json.dumps(changes_ios, indent=2, ensure_ascii=False).encode('utf-8').decode())
+    # Main script, only the key column and the mapped language columns are downloaded
+    timings = Timings('google-sheets-import-ios')
+    try:
+        results = import_google_sheets(args.spreadsheetId, [('ios', args.gid)],
+                                       ios_language_mapper=ios_language_mapper,
+                                       cache_dir=None if args.noCache else args.cacheDir,
+                                       snapshot_ttl=args.snapshotTtl, offline=args.offline,
+                                       new_rows_only=args.newRowsOnly, timings=timings)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    if results is None:
+        print("The Google Sheet did not change since the last import, nothing to do")
+        if args.timings:
+            timings.emit(args.timings)
+        sys.exit(0)
+
+    print_report("iOS", results['ios'], "Updating {key} in {lang} to {value}")
 
     print("\nFinished successfully!")
+
+    if args.timings:
+        timings.emit(args.timings)
@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+
+# Shared helpers live in the app_translations package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.api import import_google_sheets
+from app_translations.report import print_report
+from app_translations.timings import Timings
+
+google_sheet_id = '1QCllfVqvAB08cBltn-iM3gogJYBMyRv2iBy8C3XytFU'
+tabs = ['android:1225980718', 'ios:375629473']
+cache_dir = ".translations-cache"
+
+android_language_mapper = {
+    'ENGLISH': 'values-en',
+    'SPANISH': 'values',
+    'FRENCH': 'values-fr'
+    # Adjust keys as needed
+}
+
+ios_language_mapper = {
+    'ENGLISH': 'en.lproj',
+    'SPANISH': 'es.lproj',
+    'FRENCH': 'fr.lproj'
+    # Add more mappings as needed
+}
+
+language_mappers = {
+    'android': android_language_mapper,
+    'ios': ios_language_mapper,
+}
+
+
+def parse_tab(value):
+    # "android:1225980718" -> ('android', '1225980718')
+    platform, _, tab_gid = value.partition(':')
+    if platform not in language_mappers or not tab_gid:
+        raise argparse.ArgumentTypeError(f"expected android:<gid> or ios:<gid>, got {value}")
+    return platform, tab_gid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Import android and ios translations from Google Sheets.')
+    parser.add_argument('-spreadsheetId', type=str, help='Id of the public Google Sheet', default=google_sheet_id)
+    parser.add_argument('-tab', type=parse_tab, action='append',
+                        help='Worksheet tab as platform:gid (android or ios), repeatable')
+    parser.add_argument('-jobs', type=int, help='Number of tabs downloaded and files written at the same time',
+                        default=8)
+    parser.add_argument('-cacheDir', type=str, help='Folder for the downloaded worksheets', default=cache_dir)
+    parser.add_argument('-noCache', action='store_true', help='Download and import every tab even if unchanged')
+    parser.add_argument('-snapshotTtl', type=int, help='Seconds a downloaded tab is used without network', default=0)
+    parser.add_argument('-offline', action='store_true', help='Use the last downloaded tabs, whatever their age')
+    parser.add_argument('-newRowsOnly', action='store_true', help='Only download rows added since the last import')
+    parser.add_argument('-timings', type=str, nargs='?', const='-',
+                        help='Print the time of each phase and the counters as JSON, or write them to this file')
+    args = parser.parse_args()
+
+    timings = Timings('google-sheets-import')
+    tab_list = args.tab or [parse_tab(tab) for tab in tabs]
+    try:
+        results = import_google_sheets(args.spreadsheetId, tab_list, android_language_mapper, ios_language_mapper,
+                                       jobs=args.jobs, cache_dir=None if args.noCache else args.cacheDir,
+                                       snapshot_ttl=args.snapshotTtl, offline=args.offline,
+                                       new_rows_only=args.newRowsOnly, timings=timings)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
+    if results is None:
+        print("The Google Sheet did not change since the last import, nothing to do")
+    else:
+        # Reports are printed in mapper order once every writer finished
+        if 'android' in results:
+            print_report("Android", results['android'], "Updated {key} in {lang} to {value}")
+        if 'android' in results and 'ios' in results:
+            print()
+        if 'ios' in results:
+            print_report("iOS", results['ios'], "Updating {key} in {lang} to {value}")
+
+        print("\nFinished successfully!")
+    if args.timings:
+        timings.emit(args.timings)
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+
+# Shared helpers live in the app_translations package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_translations.api import import_excel
+from app_translations.report import print_report
+from app_translations.timings import Timings
+
+excelPath = "../app_translations.xlsx"
+
+android_language_mapper = {
+    'SPANISH': 'values',
+    'ENGLISH': 'values-en',
+    'FRENCH': 'values-fr'
+    # Adjust keys as needed
+}
+
+ios_language_mapper = {
+    'SPANISH': 'es.lproj',
+    'ENGLISH': 'en.lproj',
+    'FRENCH': 'fr.lproj'
+    # Add more mappings as needed
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Import android and ios translations from Excel.')
+    parser.add_argument('-excelFile', type=str, help='Excel worksheet file', default=excelPath)
+    parser.add_argument('-jobs', type=int, help='Number of locale files written at the same time', default=8)
+    parser.add_argument('-timings', type=str, nargs='?', const='-',
+                        help='Print the time of each phase and the counters as JSON, or write them to this file')
+    args = parser.parse_args()
+
+    timings = Timings('import-translations')
+    results = import_excel(args.excelFile, android_language_mapper, ios_language_mapper, jobs=args.jobs,
+                           timings=timings)
+
+    # Reports are printed in mapper order once every writer finished
+    print_report("Android", results['android'], "Updated {key} in {lang} to {value}")
+    print()
+    print_report("iOS", results['ios'], "Updating {key} in {lang} to {value}", "Changes:", "No Changes")
+    if args.timings:
+        timings.emit(args.timings)
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from app_translations import UNTRANSLATED, android
+from app_translations.android import merge_android_strings
+
+HEADER = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    # Counts the files merge_android_strings writes, still writing them
+    written = []
+
+    def write_atomic(file_path, data):
+        written.append(file_path)
+        real_write_atomic(file_path, data)
+
+    real_write_atomic = android.write_atomic
+    monkeypatch.setattr(android, 'write_atomic', write_atomic)
+    return written
+
+
+def strings_xml(*entries):
+    return HEADER + '<resources>\n' + ''.join(f'\t<string name="{key}">{value}</string>\n'
+                                             for key, value in entries) + '</resources>\n'
+
+
+def test_merge_creates_a_missing_file(tmp_path, writes):
+    xml_file = tmp_path / 'strings.xml'
+
+    changes = merge_android_strings(str(xml_file), {'hello': 'Hola', 'bye': UNTRANSLATED, 'empty': ''})
+
+    assert changes == [('added', 'hello', 'Hola')]
+    assert xml_file.read_text(encoding='utf-8') == strings_xml(('hello', 'Hola'))
+    assert len(writes) == 1
+
+
+def test_unchanged_merge_does_not_write(tmp_path, writes):
+    xml_file = tmp_path / 'strings.xml'
+    xml_file.write_text(strings_xml(('hello', 'Hola')), encoding='utf-8')
+    os.utime(xml_file, ns=(1_000_000_000, 1_000_000_000))
+
+    assert merge_android_strings(str(xml_file), {'hello': ' Hola ', 'bye': UNTRANSLATED}) == []
+    assert writes == []
+    assert os.stat(xml_file).st_mtime_ns == 1_000_000_000
+
+
+def test_update_and_add_are_written_once(tmp_path, writes):
+    xml_file = tmp_path / 'strings.xml'
+    xml_file.write_text(strings_xml(('hello', 'Hola'), ('bye', 'Adiós')), encoding='utf-8')
+
+    changes = merge_android_strings(str(xml_file), {'hello': 'Buenas', 'thanks': 'Gracias'})
+
+    assert changes == [('updated', 'hello', 'Buenas'), ('added', 'thanks', 'Gracias')]
+    assert xml_file.read_text(encoding='utf-8') == strings_xml(('hello', 'Buenas'), ('bye', 'Adiós'),
+                                                               ('thanks', 'Gracias'))
+    assert len(writes) == 1
+
+
+def test_every_declaration_of_a_repeated_key_is_updated(tmp_path):
+    xml_file = tmp_path / 'strings.xml'
+    xml_file.write_text(strings_xml(('hello', 'Hola'), ('bye', 'Adiós'), ('hello', 'Buenas')), encoding='utf-8')
+
+    assert merge_android_strings(str(xml_file), {'hello': 'Hola'}) == [('updated', 'hello', 'Hola')]
+    assert xml_file.read_text(encoding='utf-8') == strings_xml(('hello', 'Hola'), ('bye', 'Adiós'), ('hello', 'Hola'))
+    assert merge_android_strings(str(xml_file), {'hello': 'Hola'}) == []
+
+
+def test_file_without_a_trailing_newline(tmp_path):
+    xml_file = tmp_path / 'strings.xml'
+    xml_file.write_text(strings_xml(('hello', 'Hola')).rstrip('\n'), encoding='utf-8')
+
+    assert merge_android_strings(str(xml_file), {'bye': 'Adiós'}) == [('added', 'bye', 'Adiós')]
+    assert xml_file.read_text(encoding='utf-8') == strings_xml(('hello', 'Hola'), ('bye', 'Adiós'))
@@ -0,0 +1,38 @@
+from app_translations.csvexport import CsvExport, column_letter, column_runs
+
+
+def test_column_runs_groups_adjacent_columns():
+    assert column_runs([0, 1, 2, 5, 7, 8]) == [(0, 2), (5, 5), (7, 8)]
+
+
+def test_column_runs_of_a_single_or_no_column():
+    assert column_runs([3]) == [(3, 3)]
+    assert column_runs([]) == []
+
+
+def test_column_letter():
+    assert [column_letter(number) for number in (1, 26, 27, 52, 703)] == ['A', 'Z', 'AA', 'AZ', 'AAA']
+
+
+def test_join_runs_puts_the_runs_side_by_side():
+    keys = [[''], ['hello'], ['bye']]
+    languages = [['SPANISH', 'ENGLISH'], ['Hola', 'Hello'], ['Adiós', 'Bye']]
+
+    assert CsvExport._join_runs([keys, languages]) == [
+        ['', 'SPANISH', 'ENGLISH'],
+        ['hello', 'Hola', 'Hello'],
+        ['bye', 'Adiós', 'Bye'],
+    ]
+
+
+def test_join_runs_pads_short_rows_and_runs():
+    # The CSV export leaves out trailing empty cells and rows
+    keys = [[''], ['hello'], ['bye'], ['thanks']]
+    languages = [['SPANISH', 'ENGLISH'], ['Hola'], ['Adiós', 'Bye']]
+
+    assert CsvExport._join_runs([keys, languages]) == [
+        ['', 'SPANISH', 'ENGLISH'],
+        ['hello', 'Hola', ''],
+        ['bye', 'Adiós', 'Bye'],
+        ['thanks', '', ''],
+    ]
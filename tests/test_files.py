@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from app_translations.files import write_atomic
+
+
+@pytest.fixture
+def umask():
+    previous = os.umask(0o027)
+    yield 0o027
+    os.umask(previous)
+
+
+def mode(path):
+    return os.stat(path).st_mode & 0o777
+
+
+def test_write_atomic_gives_new_files_the_umask_permissions(tmp_path, umask):
+    target = tmp_path / 'nested' / 'strings.xml'
+
+    write_atomic(str(target), b'data')
+
+    assert target.read_bytes() == b'data'
+    assert mode(target) == 0o666 & ~umask
+
+
+def test_write_atomic_keeps_the_permissions_of_the_replaced_file(tmp_path, umask):
+    target = tmp_path / 'Localizable.strings'
+    target.write_bytes(b'old')
+    os.chmod(target, 0o604)
+
+    write_atomic(str(target), b'new')
+
+    assert target.read_bytes() == b'new'
+    assert mode(target) == 0o604
+
+
+def test_write_atomic_leaves_no_temporary_file(tmp_path):
+    write_atomic(str(tmp_path / 'a.json'), b'{}')
+    write_atomic(str(tmp_path / 'a.json'), b'[]')
+
+    assert os.listdir(tmp_path) == ['a.json']
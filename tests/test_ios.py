@@ -0,0 +1,146 @@
+import codecs
+import os
+
+import pytest
+
+from app_translations import UNTRANSLATED, ios
+from app_translations.ios import StringsDocument, decode_strings, iter_strings_entries, merge_ios_strings, parse_strings
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    # Counts the files StringsDocument.save writes, still writing them
+    written = []
+
+    def write_atomic(file_path, data):
+        written.append(file_path)
+        real_write_atomic(file_path, data)
+
+    real_write_atomic = ios.write_atomic
+    monkeypatch.setattr(ios, 'write_atomic', write_atomic)
+    return written
+
+
+def entries(text):
+    return [(key, value) for key, value, _ in iter_strings_entries(text)]
+
+
+def test_iter_strings_entries_spans_cover_the_whole_entry():
+    text = '/* Greeting */\n"hello" = "Hola";\n\n"bye"="Adiós";\n'
+
+    found = list(iter_strings_entries(text))
+
+    assert [(key, value) for key, value, _ in found] == [('hello', 'Hola'), ('bye', 'Adiós')]
+    assert [text[start:end] for _, _, (start, end) in found] == ['"hello" = "Hola";', '"bye"="Adiós";']
+
+
+def test_iter_strings_entries_skips_comments():
+    text = ('// "line" = "comment";\n'
+            '/* "block" = "comment";\n   "still" = "comment"; */\n'
+            '"hello" = "Hola"; // trailing\n')
+
+    assert entries(text) == [('hello', 'Hola')]
+
+
+def test_iter_strings_entries_keeps_escapes_as_written():
+    text = '"quote" = "Tap \\"OK\\"";\n"path" = "C:\\\\";\n"math" = "1 + 1 = 2;\\n";\n'
+
+    assert entries(text) == [('quote', 'Tap \\"OK\\"'), ('path', 'C:\\\\'), ('math', '1 + 1 = 2;\\n')]
+
+
+def test_iter_strings_entries_reads_multi_line_values_and_bare_keys():
+    text = '"terms" = "First line\nsecond line";\nbare_key = "Bare";\n"a" = "A"; "b" = "B";\n'
+
+    assert entries(text) == [('terms', 'First line\nsecond line'), ('bare_key', 'Bare'), ('a', 'A'), ('b', 'B')]
+
+
+def test_parse_strings_matches_iter_strings_entries():
+    plain = '/* Section */\n"hello" = "Hola";\n"bye" = "Adiós";\n'
+    escaped = plain + '"quote" = "Tap \\"OK\\"";\n'
+
+    for text in (plain, escaped):
+        assert list(parse_strings(text)) == entries(text)
+
+
+def test_decode_strings_reads_utf16():
+    text = '"hello" = "Hola";\n'
+
+    for data, encoding in ((codecs.BOM_UTF16_LE + text.encode('utf-16-le'), 'utf-16'),
+                           (text.encode('utf-16-be'), 'utf-16-be'),
+                           (codecs.BOM_UTF8 + text.encode('utf-8'), 'utf-8-sig')):
+        assert decode_strings(data) == (text, encoding)
+    assert entries(decode_strings(codecs.BOM_UTF16_LE + text.encode('utf-16-le'))[0]) == [('hello', 'Hola')]
+
+
+def test_merge_ios_strings_updates_every_declaration_of_a_key(tmp_path):
+    strings_file = tmp_path / 'Localizable.strings'
+    strings_file.write_text('"hello" = "Hola";\n"bye" = "Adiós";\n"hello" = "Buenas";\n', encoding='utf-8')
+
+    assert merge_ios_strings(str(strings_file), {'hello': 'Hola', 'bye': 'Adiós'}) == [('updated', 'hello', 'Hola')]
+    assert strings_file.read_text(encoding='utf-8') == '"hello" = "Hola";\n"bye" = "Adiós";\n"hello" = "Hola";\n'
+    assert merge_ios_strings(str(strings_file), {'hello': 'Hola'}) == []
+
+
+def test_merge_ios_strings_round_trips_quotes_and_backslashes(tmp_path):
+    strings_file = tmp_path / 'Localizable.strings'
+    strings_file.write_text('/* Buttons */\n"ok" = "Tap \\"OK\\"";\n', encoding='utf-8')
+    translations = {'ok': 'Tap \\"OK\\"', 'quote': 'Say "hi"', 'path': 'C:\\', 'both': '\\"a" b\\'}
+
+    changes = merge_ios_strings(str(strings_file), translations)
+    data = strings_file.read_bytes()
+
+    assert [(action, key) for action, key, _ in changes] == [('added', 'quote'), ('added', 'path'), ('added', 'both')]
+    assert entries(data.decode('utf-8')) == [('ok', 'Tap \\"OK\\"'), ('quote', 'Say \\"hi\\"'), ('path', 'C:\\\\'),
+                                             ('both', '\\"a\\" b\\\\')]
+    assert merge_ios_strings(str(strings_file), translations) == []
+    assert strings_file.read_bytes() == data
+
+
+def test_render_applies_updates_in_place_and_appends_additions():
+    document = StringsDocument('/* Greetings */\n"hello" = "Hola";\n\n"bye" = "Adiós"; // short\n')
+
+    assert document.set('hello', 'Buenas') == 'updated'
+    assert document.set('bye', 'Adiós') is None
+    assert document.set('thanks', 'Gracias') == 'added'
+    assert document.render() == ('/* Greetings */\n"hello" = "Buenas";\n\n"bye" = "Adiós"; // short\n'
+                                 '"thanks" = "Gracias";\n')
+
+
+def test_render_adds_the_missing_trailing_newline_before_additions():
+    document = StringsDocument('"hello" = "Hola";')
+
+    document.set('bye', 'Adiós')
+
+    assert document.render() == '"hello" = "Hola";\n"bye" = "Adiós";\n'
+
+
+def test_unchanged_merge_does_not_write(tmp_path, writes):
+    strings_file = tmp_path / 'Localizable.strings'
+    strings_file.write_text('"hello" = "Hola";\n', encoding='utf-8')
+    os.utime(strings_file, ns=(1_000_000_000, 1_000_000_000))
+
+    assert merge_ios_strings(str(strings_file), {'hello': 'Hola', 'bye': UNTRANSLATED, 'empty': None}) == []
+    assert writes == []
+    assert os.stat(strings_file).st_mtime_ns == 1_000_000_000
+
+
+def test_update_and_add_are_written_once(tmp_path, writes):
+    strings_file = tmp_path / 'Localizable.strings'
+    strings_file.write_text('"hello" = "Hola";\n"bye" = "Adiós";', encoding='utf-8')
+
+    changes = merge_ios_strings(str(strings_file), {'hello': 'Buenas', 'thanks': 'Gracias'})
+
+    assert changes == [('updated', 'hello', 'Buenas'), ('added', 'thanks', 'Gracias')]
+    assert strings_file.read_text(encoding='utf-8') == '"hello" = "Buenas";\n"bye" = "Adiós";\n"thanks" = "Gracias";\n'
+    assert len(writes) == 1
+
+
+def test_save_creates_a_missing_file_and_keeps_the_encoding(tmp_path):
+    created = tmp_path / 'es.lproj' / 'Localizable.strings'
+    assert merge_ios_strings(str(created), {'hello': 'Hola'}) == [('added', 'hello', 'Hola')]
+    assert created.read_bytes() == '"hello" = "Hola";\n'.encode('utf-8')
+
+    utf16 = tmp_path / 'Localizable.strings'
+    utf16.write_bytes(codecs.BOM_UTF16_LE + '"hello" = "Hola";\n'.encode('utf-16-le'))
+    merge_ios_strings(str(utf16), {'bye': 'Adiós'})
+    assert decode_strings(utf16.read_bytes()) == ('"hello" = "Hola";\n"bye" = "Adiós";\n', 'utf-16')
@@ -0,0 +1,220 @@
+import pytest
+
+from app_translations import UNTRANSLATED
+from app_translations.api import export_google_sheets
+from app_translations.sheets import RequestScheduler, chunk_value_ranges, diff_blocks, write_blocks
+from app_translations.table import TranslationTable
+
+
+class CountingWorksheet:
+    """Stands in for a gspread Worksheet and records the values batch updates."""
+
+    def __init__(self, values=None, row_count=1000, col_count=26):
+        self.values = [list(row) for row in values or []]
+        self.row_count = row_count
+        self.col_count = col_count
+        self.batch_updates = []
+        self.resizes = []
+
+    def batch_update(self, data, value_input_option=None):
+        self.batch_updates.append(data)
+
+    def resize(self, rows=None, cols=None):
+        self.resizes.append((rows, cols))
+        self.row_count, self.col_count = rows, cols
+
+    def get_all_values(self):
+        return self.values
+
+    def col_values(self, col):
+        return [row[col - 1] if col - 1 < len(row) else '' for row in self.values]
+
+    def row_values(self, row):
+        return self.values[row - 1] if row - 1 < len(self.values) else []
+
+
+class CountingSpreadsheet:
+    id = 'spreadsheet'
+    url = 'https://docs.google.com/spreadsheets/d/spreadsheet'
+
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+
+    def get_worksheet(self, index):
+        return self.worksheets[index]
+
+
+class CountingClient:
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open_by_key(self, spreadsheet_id):
+        return self.spreadsheet
+
+
+def scheduler():
+    return RequestScheduler(requests_per_minute=6000, sleep=lambda seconds: None)
+
+
+def table(rows):
+    texts = TranslationTable()
+    for key, values in rows.items():
+        texts.add_key(key)
+        for locale, value in values.items():
+            texts.set(key, locale, value)
+    return texts
+
+
+def row_bytes(row):
+    return sum(len(str(value).encode('utf-8')) + 4 for value in row)
+
+
+def written_rows(batch_updates):
+    return [row for data in batch_updates for value_range in data for row in value_range['values']]
+
+
+def write_project(root, keys):
+    values_dir = root / 'android' / 'values'
+    values_dir.mkdir(parents=True)
+    values_dir.joinpath('strings.xml').write_text(
+        '<resources>\n' + ''.join(f'    <string name="{key}">Hola {key}</string>\n' for key in keys) + '</resources>\n',
+        encoding='utf-8')
+    lproj_dir = root / 'ios' / 'es.lproj'
+    lproj_dir.mkdir(parents=True)
+    lproj_dir.joinpath('Localizable.strings').write_text(
+        ''.join(f'"{key}" = "Hola {key}";\n' for key in keys), encoding='utf-8')
+
+
+@pytest.mark.parametrize('sync_mode', ['new', 'diff'])
+def test_export_sends_one_batch_update_per_worksheet(tmp_path, sync_mode):
+    write_project(tmp_path, [f'key_{i}' for i in range(500)])
+    android = CountingWorksheet([['', 'SPANISH'], ['key_0', 'Old']])
+    ios = CountingWorksheet()
+    client = CountingClient(CountingSpreadsheet([android, ios]))
+
+    result = export_google_sheets(str(tmp_path / 'android'), str(tmp_path / 'ios'), 'spreadsheet',
+                                  {'values': 'SPANISH'}, {'es.lproj': 'SPANISH'}, sync_mode=sync_mode,
+                                  client=client, scheduler=scheduler())
+
+    assert len(android.batch_updates) == 1
+    assert len(ios.batch_updates) == 1
+    assert len(result['android']['new_keys']) == 499
+    assert len(result['ios']['new_keys']) == 500
+    assert len(written_rows(ios.batch_updates)) == 501
+
+
+def test_write_blocks_sends_everything_in_one_request_under_the_limit():
+    worksheet = CountingWorksheet()
+    rows = [[f'key_{i}', 'value'] for i in range(100)]
+
+    write_blocks(scheduler(), worksheet, [(1, 2, [['SPANISH']]), (2, 1, rows)])
+
+    assert len(worksheet.batch_updates) == 1
+    assert [value_range['range'] for value_range in worksheet.batch_updates[0]] == ['B1', 'A2']
+
+
+def test_write_blocks_splits_at_max_payload_bytes():
+    worksheet = CountingWorksheet()
+    rows = [[f'key_{i:03}', 'x' * 50] for i in range(100)]
+    limit = row_bytes(rows[0]) * 10
+
+    write_blocks(scheduler(), worksheet, [(2, 1, rows)], max_payload_bytes=limit)
+
+    assert len(worksheet.batch_updates) == 10
+    assert written_rows(worksheet.batch_updates) == rows
+    for data in worksheet.batch_updates:
+        assert sum(row_bytes(row) for value_range in data for row in value_range['values']) <= limit
+    assert [data[0]['range'] for data in worksheet.batch_updates] == [f'A{2 + 10 * i}' for i in range(10)]
+
+
+def test_write_blocks_resizes_the_grid_before_writing_past_it():
+    worksheet = CountingWorksheet(row_count=10, col_count=2)
+
+    write_blocks(scheduler(), worksheet, [(10, 1, [['a', 'b', 'c'], ['d', 'e', 'f']])])
+
+    assert worksheet.resizes == [(11, 3)]
+    assert len(worksheet.batch_updates) == 1
+
+
+def test_chunk_value_ranges_sends_an_oversized_row_alone():
+    small = ['key', 'value']
+    large = ['big', 'x' * 1000]
+    limit = row_bytes(small) * 3
+
+    chunks = list(chunk_value_ranges([(2, 1, [small, small, large, small])], limit))
+
+    assert [[value_range['values'] for value_range in chunk] for chunk in chunks] == [
+        [[small, small]],
+        [[large]],
+        [[small]],
+    ]
+    assert [chunk[0]['range'] for chunk in chunks] == ['A2', 'A4', 'A5']
+
+
+def test_chunk_value_ranges_keeps_blocks_together_in_one_chunk():
+    blocks = [(1, 3, [['FRENCH']]), (5, 2, [['Bonjour']]), (9, 1, [['key', 'Hola', 'Bonjour']])]
+
+    chunks = list(chunk_value_ranges(blocks, 1024))
+
+    assert chunks == [[
+        {'range': 'C1', 'values': [['FRENCH']]},
+        {'range': 'B5', 'values': [['Bonjour']]},
+        {'range': 'A9', 'values': [['key', 'Hola', 'Bonjour']]},
+    ]]
+
+
+def test_diff_blocks_on_an_empty_worksheet_writes_the_header_and_every_key():
+    texts = table({'hello': {'SPANISH': 'Hola'}, 'bye': {'SPANISH': 'Adiós'}})
+
+    blocks, changed_cells, new_keys = diff_blocks([], texts, ['SPANISH'])
+
+    assert blocks == [(1, 2, [['SPANISH']]), (2, 1, [['hello', 'Hola'], ['bye', 'Adiós']])]
+    assert changed_cells == 0
+    assert new_keys == ['hello', 'bye']
+
+
+def test_diff_blocks_only_writes_changed_cells_and_merges_neighbours():
+    values = [
+        ['', 'SPANISH', 'ENGLISH', 'FRENCH'],
+        ['hello', 'Hola', 'Hi', 'Salut'],
+        ['bye', 'Adiós', 'Bye', 'Au revoir'],
+    ]
+    texts = table({
+        'hello': {'SPANISH': 'Hola', 'ENGLISH': 'Hello', 'FRENCH': 'Bonjour'},
+        'bye': {'SPANISH': 'Chao', 'ENGLISH': 'Bye', 'FRENCH': 'Au revoir'},
+    })
+
+    blocks, changed_cells, new_keys = diff_blocks(values, texts, ['SPANISH', 'ENGLISH', 'FRENCH'])
+
+    assert blocks == [(2, 3, [['Hello', 'Bonjour']]), (3, 2, [['Chao']])]
+    assert changed_cells == 3
+    assert new_keys == []
+
+
+def test_diff_blocks_adds_missing_languages_and_appends_new_keys():
+    values = [['', 'SPANISH'], ['hello', 'Hola'], ['', ''], ['bye', 'Adiós']]
+    texts = table({
+        'hello': {'SPANISH': 'Hola', 'ENGLISH': 'Hello'},
+        'thanks': {'SPANISH': 'Gracias'},
+    })
+
+    blocks, changed_cells, new_keys = diff_blocks(values, texts, ['SPANISH', 'ENGLISH'])
+
+    assert blocks == [
+        (1, 3, [['ENGLISH']]),
+        (2, 3, [['Hello']]),
+        (5, 1, [['thanks', 'Gracias', UNTRANSLATED]]),
+    ]
+    assert changed_cells == 1
+    assert new_keys == ['thanks']
+
+
+def test_diff_blocks_never_overwrites_with_untranslated():
+    values = [['', 'SPANISH', 'ENGLISH'], ['hello', 'Hola', 'Hi']]
+    texts = table({'hello': {'SPANISH': UNTRANSLATED}})
+
+    blocks, changed_cells, new_keys = diff_blocks(values, texts, ['SPANISH', 'ENGLISH'])
+
+    assert blocks == []
+    assert changed_cells == 0
+    assert new_keys == []